@@ -0,0 +1,113 @@
+# Import necessary libraries
+import argparse
+from bi_logging import append_metric, flush_metrics, span
+from concurrent.futures import ProcessPoolExecutor
+from config import AppConfig
+import csv
+from data_pipeline import DATASET_FILENAME, build_dataset
+from embedding_index import EmbeddingIndex
+import json
+import os
+from pathlib import Path
+from pptx_builder import build_presentation
+from rag_generator import RETRIEVAL_CACHE, generate_many_slides, presentation_stats
+from typing import Dict, List, Optional
+from utils import slugify
+
+JOB_FIELDS = ("topic", "intent", "audience")
+
+def load_jobs(job_path: Path, default_slides: int = 8) -> List[Dict]:
+    """ 
+    Read deck jobs from a CSV (with header) or JSONL file.
+    @param job_path (Path): Job file; each job has 'topic', 'intent', 'audience' and optional 'n_slides' and 'title'.
+    @param default_slides (int): Slide count for jobs that do not set 'n_slides'.
+    @return (List[Dict]): Validated jobs in file order. 
+    """
+    with job_path.open("r", encoding = "utf-8") as f:
+        if job_path.suffix.lower() == ".csv":
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+    jobs: List[Dict] = []
+    for n, row in enumerate(rows, start = 1):
+        missing = [field for field in JOB_FIELDS if not str(row.get(field) or "").strip()]
+        if missing:
+            raise ValueError(f"Job {n} in {job_path} is missing {missing}.")
+        job = {field: str(row[field]).strip() for field in JOB_FIELDS}
+        job["n_slides"] = int(row.get("n_slides") or default_slides)
+        job["title"] = str(row.get("title") or "").strip()
+        jobs.append(job)
+    return jobs
+
+def _build_deck(slides: List[Dict], out_path: Path, title: str) -> Path:
+    """ 
+    Build one deck inside a worker process.
+    @param slides (List[Dict]): Slides with 'title', 'bullets', 'notes'.
+    @param out_path (Path): Destination .pptx file.
+    @param title (str): Presentation title.
+    @return (Path): Saved deck path. 
+    """
+    return build_presentation(slides = slides, out_path = out_path, title = title)
+
+def run_batch(job_path: Path, workers: Optional[int] = None, out_dir: Optional[Path] = None) -> List[Path]:
+    """ 
+    Generate one deck per job: load the index once, retrieve for all decks in a single batch and build PPTX files in parallel.
+    @param job_path (Path): CSV or JSONL job file.
+    @param workers (Optional[int]): PPTX worker processes, defaults to the CPU count.
+    @param out_dir (Optional[Path]): Destination directory, defaults to 'outputs/batch'.
+    @return (List[Path]): Deck paths in job order. 
+    """
+    cfg = AppConfig()
+    cfg.ensure_dirs()
+    out_dir = out_dir if out_dir is not None else cfg.outputs_dir / "batch"
+    out_dir.mkdir(parents = True, exist_ok = True)
+    jobs = load_jobs(job_path)
+    with span("batch_stage_seconds", stage = "index") as index_span:
+        dataset_path = cfg.data_dir / DATASET_FILENAME
+        if not dataset_path.exists():
+            dataset_path = build_dataset(data_dir = cfg.data_dir, min_samples = cfg.min_samples, workers = cfg.preprocess_workers, limit = max(cfg.min_samples, cfg.download_limit), concurrency = cfg.download_concurrency, dedup_threshold = cfg.dedup_threshold)
+        index = EmbeddingIndex(**cfg.index_params())
+        index.build_or_load(dataset_path = dataset_path, cache_dir = cfg.index_dir, batch_size = cfg.embed_batch_size)
+    with span("batch_stage_seconds", stage = "generation") as generation_span:
+        decks = generate_many_slides(index, jobs)
+    paths = [out_dir / f"{n:04d}_{slugify(job['topic'])}_{slugify(job['intent'])}_{slugify(job['audience'])}.pptx" for n, job in enumerate(jobs, start = 1)]
+    titles = [job["title"] or cfg.presentation_title for job in jobs]
+    workers = workers or os.cpu_count() or 1
+    # PPTX serialization is CPU bound pure Python, so decks are spread over processes
+    with span("batch_stage_seconds", stage = "pptx") as pptx_span:
+        with ProcessPoolExecutor(max_workers = workers) as pool:
+            chunksize = max(1, len(jobs) // (workers * 4))
+            paths = list(pool.map(_build_deck, decks, paths, titles, chunksize = chunksize))
+    for job, slides in zip(jobs, decks):
+        append_metric(cfg.logs_dir, "presentation_stats.csv", presentation_stats(job["topic"], job["intent"], job["audience"], slides))
+    elapsed = index_span.seconds + generation_span.seconds + pptx_span.seconds
+    retrieval = RETRIEVAL_CACHE.stats()
+    decks_per_minute = len(jobs) / elapsed * 60.0 if elapsed > 0 else 0.0
+    append_metric(cfg.logs_dir, "batch_times.csv", {
+        "decks": len(jobs),
+        "workers": workers,
+        "index_seconds": round(index_span.seconds, 3),
+        "generation_seconds": round(generation_span.seconds, 3),
+        "pptx_seconds": round(pptx_span.seconds, 3),
+        "retrieval_hits": retrieval["hits"],
+        "retrieval_misses": retrieval["misses"],
+        "total_seconds": round(elapsed, 3),
+        "decks_per_minute": round(decks_per_minute, 2)
+    })
+    flush_metrics()
+    print(f"Generated {len(jobs)} decks in {elapsed:.2f}s ({decks_per_minute:.1f} decks/min) into {out_dir}")
+    return paths
+
+def main() -> None:
+    """ 
+    Command line entry point for batch generation. 
+    """
+    parser = argparse.ArgumentParser(description = "Generate many presentations from a CSV/JSONL job file.")
+    parser.add_argument("jobs", type = Path, help = "Job file with topic, intent, audience[, n_slides, title] per deck.")
+    parser.add_argument("--workers", type = int, default = None, help = "PPTX worker processes.")
+    parser.add_argument("--out-dir", type = Path, default = None)
+    args = parser.parse_args()
+    run_batch(args.jobs, workers = args.workers, out_dir = args.out_dir)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
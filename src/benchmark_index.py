@@ -0,0 +1,140 @@
+# Import necessary libraries
+import argparse
+from bi_logging import append_metric
+from embedding_index import INDEX_TYPES, make_faiss_index, rescore, tune_search
+import faiss
+import numpy as np
+import os
+from pathlib import Path
+import tempfile
+from time import perf_counter
+from typing import Dict, List, Sequence, Tuple
+
+def synthetic_corpus(n: int, dim: int, n_queries: int, seed: int = 42) -> Tuple[np.ndarray, np.ndarray]:
+    """ 
+    Generate clustered, normalized vectors that mimic sentence embeddings.
+    @param n (int): Number of corpus vectors.
+    @param dim (int): Vector dimension.
+    @param n_queries (int): Number of query vectors.
+    @param seed (int): Random seed.
+    @return (Tuple[np.ndarray, np.ndarray]): Corpus and query matrices (float32, L2-normalized). 
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(8, n // 500), dim)).astype(np.float32)
+    def sample(count: int) -> np.ndarray:
+        x = centers[rng.integers(0, len(centers), size = count)]
+        x = x + 0.6 * rng.standard_normal((count, dim)).astype(np.float32)
+        x /= np.linalg.norm(x, axis = 1, keepdims = True)
+        return np.ascontiguousarray(x, dtype = np.float32)
+    return sample(n), sample(n_queries)
+
+def index_size_bytes(index: faiss.Index) -> int:
+    """ 
+    Measure the serialized size of an index, a close proxy for its resident memory.
+    @param index (faiss.Index): Index to measure.
+    @return (int): Size in bytes. 
+    """
+    fd, path = tempfile.mkstemp(suffix = ".faiss")
+    os.close(fd)
+    try:
+        faiss.write_index(index, path)
+        return os.path.getsize(path)
+    finally:
+        os.remove(path)
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    """ 
+    Fraction of the exact top-k neighbours that an approximate search returned.
+    @param found (np.ndarray): Approximate result IDs of shape (n_queries, k).
+    @param truth (np.ndarray): Exact result IDs of shape (n_queries, k).
+    @return (float): Mean recall@k over all queries. 
+    """
+    hits = sum(len(set(f[f >= 0]) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+def benchmark_index(index_type: str, corpus: np.ndarray, queries: np.ndarray, truth: np.ndarray, k: int, nlist: int, pq_m: int, hnsw_m: int, nprobe: int, ef_search: int, rescore_factors: Sequence[int] = (1,)) -> List[Dict]:
+    """ 
+    Build one index type over a corpus and measure recall, latency and memory, optionally re-ranking candidates exactly.
+    @param index_type (str): Index family from INDEX_TYPES.
+    @param corpus (np.ndarray): Corpus vectors.
+    @param queries (np.ndarray): Query vectors.
+    @param truth (np.ndarray): Exact top-k IDs from a flat index.
+    @param k (int): Number of neighbours per query.
+    @param nlist (int): IVF list count.
+    @param pq_m (int): PQ sub-quantizer count.
+    @param hnsw_m (int): HNSW neighbours per node.
+    @param nprobe (int): IVF lists visited per query.
+    @param ef_search (int): HNSW candidate list size.
+    @param rescore_factors (Sequence[int]): Candidate multipliers to measure; factor f fetches k * f results and rescores them against 'corpus'.
+    @return (List[Dict]): One metric row per rescore factor for the benchmark CSV. 
+    """
+    t_0 = perf_counter()
+    index = make_faiss_index(corpus.shape[1], len(corpus), index_type = index_type, nlist = nlist, pq_m = pq_m, hnsw_m = hnsw_m)
+    if not index.is_trained:
+        index.train(corpus)
+    index.add(corpus)
+    tune_search(index, nprobe = nprobe, ef_search = ef_search)
+    build_seconds = perf_counter() - t_0
+    size = index_size_bytes(index)
+    rows: List[Dict] = []
+    for factor in rescore_factors:
+        fetch_k = min(k * max(1, factor), len(corpus))
+        latencies: List[float] = []
+        found = np.empty_like(truth)
+        for qi in range(len(queries)):
+            t_q = perf_counter()
+            _, idxs = index.search(queries[qi:qi + 1], fetch_k)
+            candidates = idxs[0][idxs[0] >= 0]
+            if factor > 1:
+                candidates, _ = rescore(queries[qi], candidates, corpus, k)
+            latencies.append((perf_counter() - t_q) * 1000.0)
+            found[qi] = -1
+            found[qi, :min(k, len(candidates))] = candidates[:k]
+        rows.append({
+            "index_type": index_type,
+            "n_vectors": len(corpus),
+            "dim": corpus.shape[1],
+            "k": k,
+            "rescore_factor": factor,
+            "recall_at_k": round(recall_at_k(found, truth), 4),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 4),
+            "p99_ms": round(float(np.percentile(latencies, 99)), 4),
+            "build_seconds": round(build_seconds, 3),
+            "index_mb": round(size / 2 ** 20, 2),
+            "bytes_per_vector": round(size / len(corpus), 1),
+            "mb_per_million": round(size / len(corpus) * 1e6 / 2 ** 20, 1)
+        })
+    return rows
+
+def main() -> None:
+    """ 
+    Run the index benchmark over several synthetic corpus sizes and log the results. 
+    """
+    parser = argparse.ArgumentParser(description = "Benchmark FAISS index types against exact flat search.")
+    parser.add_argument("--sizes", type = int, nargs = "+", default = [10_000, 100_000, 1_000_000])
+    parser.add_argument("--types", nargs = "+", default = list(INDEX_TYPES), choices = INDEX_TYPES)
+    parser.add_argument("--dim", type = int, default = 384)
+    parser.add_argument("--queries", type = int, default = 500)
+    parser.add_argument("--k", type = int, default = 10)
+    parser.add_argument("--nlist", type = int, default = 1024)
+    parser.add_argument("--pq-m", type = int, default = 16)
+    parser.add_argument("--hnsw-m", type = int, default = 32)
+    parser.add_argument("--nprobe", type = int, default = 16)
+    parser.add_argument("--ef-search", type = int, default = 64)
+    parser.add_argument("--rescore", type = int, nargs = "+", default = [1, 4], help = "Candidate multipliers re-ranked with exact float32 scores (1 = no rescoring).")
+    parser.add_argument("--log-dir", type = Path, default = Path("outputs") / "logs")
+    args = parser.parse_args()
+    for n in args.sizes:
+        corpus, queries = synthetic_corpus(n, args.dim, args.queries)
+        exact = faiss.IndexFlatIP(args.dim)
+        exact.add(corpus)
+        _, truth = exact.search(queries, args.k)
+        del exact
+        print(f"n={n}: full-precision vectors use {corpus.nbytes / 2 ** 20:.1f} MB ({args.dim * 4 * 1e6 / 2 ** 20:.1f} MB per million)")
+        for index_type in args.types:
+            for row in benchmark_index(index_type, corpus, queries, truth, args.k, args.nlist, args.pq_m, args.hnsw_m, args.nprobe, args.ef_search, args.rescore):
+                append_metric(args.log_dir, "index_benchmark.csv", row)
+                print(", ".join(f"{key}={value}" for key, value in row.items()))
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,230 @@
+# Import necessary libraries
+import argparse
+from benchmark_preprocess import synthetic_news
+import cProfile
+from contextlib import contextmanager
+from data_pipeline import chunk_text, preprocess_records, write_records
+from embedding_index import INDEX_TYPES, EmbeddingIndex
+import faiss
+import json
+from model_registry import register_model
+import numpy as np
+from pathlib import Path
+import platform
+from pptx_builder import build_presentation
+from rag_generator import RETRIEVAL_CACHE, generate_many_slides
+import sys
+import tempfile
+from time import perf_counter, time
+from typing import Callable, Dict, Iterator, List, Optional
+from utils import normalize_vi_text
+import zlib
+
+STUB_MODEL_NAME = "stub/hashing-encoder-384"
+JOBS = [
+    {"topic": "Chuyển đổi số", "intent": "giảng dạy", "audience": "sinh viên", "n_slides": 10},
+    {"topic": "Khởi nghiệp", "intent": "bán hàng", "audience": "quản lý", "n_slides": 10},
+    {"topic": "Tin tức tổng hợp", "intent": "thuyết minh", "audience": "công chúng", "n_slides": 10}
+]
+
+class HashingEncoder:
+    """ 
+    Offline stand-in for a sentence transformer: hashes word unigrams and bigrams into a fixed-size normalized vector.
+
+    Attributes:
+    - dim (int): Embedding dimension. 
+    """
+
+    def __init__(self, dim: int = 384) -> None:
+        self.dim = dim
+
+    def get_sentence_embedding_dimension(self) -> int:
+        """ 
+        Embedding dimension, as reported by SentenceTransformer.
+        @return (int): Vector length. 
+        """
+        return self.dim
+
+    def encode(self, texts: List[str], convert_to_numpy: bool = True, normalize_embeddings: bool = True, **kwargs) -> np.ndarray:
+        """ 
+        Encode texts the way 'SentenceTransformer.encode' is called by EmbeddingIndex.
+        @param texts (List[str]): Texts to encode.
+        @param convert_to_numpy (bool): Ignored, results are always NumPy arrays.
+        @param normalize_embeddings (bool): L2-normalize each row.
+        @return (np.ndarray): float32 matrix of shape (len(texts), dim). 
+        """
+        emb = np.zeros((len(texts), self.dim), dtype = np.float32)
+        for row, text in enumerate(texts):
+            words = text.lower().split()
+            for token in words + [a + " " + b for a, b in zip(words, words[1:])]:
+                emb[row, zlib.crc32(token.encode("utf-8")) % self.dim] += 1.0
+        if normalize_embeddings:
+            emb /= np.maximum(np.linalg.norm(emb, axis = 1, keepdims = True), 1e-12)
+        return emb
+
+class Suite:
+    """ 
+    Collects timings for named benchmarks and optionally profiles each one.
+
+    Attributes:
+    - repeat (int): Runs per benchmark; the median is reported.
+    - profile_dir (Optional[Path]): Directory receiving one cProfile dump per benchmark.
+    - results (Dict[str, Dict]): 'seconds', 'ops' and 'ops_per_sec' per benchmark. 
+    """
+
+    def __init__(self, repeat: int = 3, profile_dir: Optional[Path] = None) -> None:
+        self.repeat = max(1, repeat)
+        self.profile_dir = profile_dir
+        self.results: Dict[str, Dict] = {}
+        if profile_dir is not None:
+            profile_dir.mkdir(parents = True, exist_ok = True)
+
+    @contextmanager
+    def _profiled(self, name: str) -> Iterator[None]:
+        """ 
+        Profile the enclosed block into '<profile_dir>/<name>.prof' when profiling is enabled.
+        @param name (str): Benchmark name. 
+        """
+        if self.profile_dir is None:
+            yield
+            return
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(str(self.profile_dir / f"{name}.prof"))
+
+    def measure(self, name: str, func: Callable[[], object], ops: int) -> object:
+        """ 
+        Time a benchmark 'repeat' times and record the median.
+        @param name (str): Benchmark name, the key in 'results'.
+        @param func (Callable[[], object]): Work to time; called once per run.
+        @param ops (int): Operations one call performs, used for the throughput.
+        @return (object): Return value of the last run. 
+        """
+        timings: List[float] = []
+        value = None
+        for run in range(self.repeat):
+            # Only the last run is profiled so the dump matches one representative call
+            with self._profiled(name) if run == self.repeat - 1 else _nothing():
+                t_0 = perf_counter()
+                value = func()
+                timings.append(perf_counter() - t_0)
+        seconds = float(np.median(timings))
+        self.results[name] = {"seconds": round(seconds, 6), "ops": ops, "ops_per_sec": round(ops / seconds, 1) if seconds > 0 else 0.0}
+        print(f"{name}: {seconds * 1000.0:.2f} ms, {self.results[name]['ops_per_sec']} ops/s")
+        return value
+
+@contextmanager
+def _nothing() -> Iterator[None]:
+    """ 
+    No-op context for unprofiled runs. 
+    """
+    yield
+
+def run_suite(sizes: List[int], n_queries: int = 200, index_type: str = "flat", repeat: int = 3, profile_dir: Optional[Path] = None) -> Dict:
+    """ 
+    Time text preprocessing, index build, search, slide generation and PPTX build with offline stub backends.
+    @param sizes (List[int]): Corpus sizes in records; index build and search are measured at each.
+    @param n_queries (int): Queries per search benchmark.
+    @param index_type (str): Index family from INDEX_TYPES.
+    @param repeat (int): Runs per benchmark; the median is reported.
+    @param profile_dir (Optional[Path]): Directory for cProfile dumps, None disables profiling.
+    @return (Dict): 'meta' describing the run and 'results' per benchmark. 
+    """
+    register_model(STUB_MODEL_NAME, HashingEncoder())
+    suite = Suite(repeat = repeat, profile_dir = profile_dir)
+    texts = [raw[3] for raw in synthetic_news(2000, sentences_per_record = 10)]
+    normalized = [normalize_vi_text(text) for text in texts]
+    suite.measure("normalize_vi_text", lambda: [normalize_vi_text(text) for text in texts], len(texts))
+    suite.measure("chunk_text", lambda: [chunk_text(text) for text in normalized], len(normalized))
+    with tempfile.TemporaryDirectory(prefix = "bench_pipeline_") as tmp:
+        tmp_dir = Path(tmp)
+        index = None
+        for n in sizes:
+            dataset_path = tmp_dir / f"dataset_{n}.pack"
+            write_records(preprocess_records(synthetic_news(n, sentences_per_record = 10)), dataset_path)
+            def build() -> EmbeddingIndex:
+                built = EmbeddingIndex(model_name = STUB_MODEL_NAME, index_type = index_type)
+                built.build(dataset_path)
+                return built
+            index = suite.measure(f"index_build[{n}]", build, n)
+            queries = [normalize_vi_text(text[:120]) for text in texts[:n_queries]]
+            suite.measure(f"search_batch[{n}]", lambda: index.search_many(queries, top_k = 4), len(queries))
+            suite.measure(f"search_single[{n}]", lambda: [index.search(query, top_k = 4) for query in queries], len(queries))
+        def generate() -> List[List[Dict]]:
+            # Cold cache, so every run pays for retrieval
+            RETRIEVAL_CACHE.clear()
+            return generate_many_slides(index, JOBS)
+        decks = suite.measure("generate_slides", generate, len(JOBS))
+        suite.measure("build_pptx", lambda: [build_presentation(slides, tmp_dir / f"deck_{n}.pptx", "Benchmark") for n, slides in enumerate(decks)], len(decks))
+    return {
+        "meta": {
+            "timestamp": time(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "faiss": getattr(faiss, "__version__", "unknown"),
+            "sizes": sizes,
+            "queries": n_queries,
+            "index_type": index_type,
+            "repeat": repeat
+        },
+        "results": suite.results
+    }
+
+def compare(results: Dict, baseline: Dict, tolerance: float = 0.2) -> List[str]:
+    """ 
+    Find benchmarks that got slower than a stored baseline.
+    @param results (Dict): Output of 'run_suite'.
+    @param baseline (Dict): Earlier output of 'run_suite'.
+    @param tolerance (float): Allowed relative slowdown before a benchmark counts as a regression.
+    @return (List[str]): One message per regressed benchmark. 
+    """
+    regressions: List[str] = []
+    for name, current in results["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if before is None or before["seconds"] <= 0:
+            continue
+        ratio = current["seconds"] / before["seconds"]
+        print(f"{name}: {before['seconds'] * 1000.0:.2f} ms -> {current['seconds'] * 1000.0:.2f} ms ({ratio:.2f}x)")
+        if ratio > 1.0 + tolerance:
+            regressions.append(f"{name} is {ratio:.2f}x slower than the baseline")
+    return regressions
+
+def main() -> None:
+    """ 
+    Command line entry point: run the suite, write JSON results and compare them with a baseline. 
+    """
+    parser = argparse.ArgumentParser(description = "Benchmark the generation pipeline offline with stub model and TTS backends.")
+    parser.add_argument("--sizes", type = int, nargs = "+", default = [1000, 10_000])
+    parser.add_argument("--queries", type = int, default = 200)
+    parser.add_argument("--index-type", default = "flat", choices = INDEX_TYPES)
+    parser.add_argument("--repeat", type = int, default = 3)
+    parser.add_argument("--out", type = Path, default = Path("outputs") / "logs" / "benchmark_pipeline.json")
+    parser.add_argument("--baseline", type = Path, default = None, help = "Earlier results to compare against; exits non-zero on regressions.")
+    parser.add_argument("--tolerance", type = float, default = 0.2, help = "Allowed relative slowdown per benchmark.")
+    parser.add_argument("--save-baseline", action = "store_true", help = "Also write the results to the --baseline path.")
+    parser.add_argument("--profile", type = Path, default = None, help = "Directory for per-benchmark cProfile dumps (view with snakeviz or flameprof).")
+    args = parser.parse_args()
+    results = run_suite(args.sizes, n_queries = args.queries, index_type = args.index_type, repeat = args.repeat, profile_dir = args.profile)
+    args.out.parent.mkdir(parents = True, exist_ok = True)
+    args.out.write_text(json.dumps(results, indent = 2), encoding = "utf-8")
+    print(f"Results written to {args.out}")
+    if args.baseline is None:
+        return
+    if args.save_baseline or not args.baseline.exists():
+        args.baseline.parent.mkdir(parents = True, exist_ok = True)
+        args.baseline.write_text(json.dumps(results, indent = 2), encoding = "utf-8")
+        print(f"Baseline written to {args.baseline}")
+        return
+    regressions = compare(results, json.loads(args.baseline.read_text(encoding = "utf-8")), tolerance = args.tolerance)
+    for message in regressions:
+        print(f"REGRESSION: {message}")
+    if regressions:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
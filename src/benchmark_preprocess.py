@@ -0,0 +1,60 @@
+# Import necessary libraries
+import argparse
+from bi_logging import append_metric
+from data_pipeline import RawRecord, preprocess_records
+import os
+from pathlib import Path
+import random
+from time import perf_counter
+from typing import Iterator
+
+SENTENCES = [
+    "Thị trường chứng khoán Việt Nam ghi nhận phiên giao dịch sôi động , với thanh khoản tăng mạnh",
+    "Bộ Giáo dục và Đào tạo công bố kế hoạch tuyển sinh năm học mới :  nhiều thay đổi quan trọng",
+    "Các doanh nghiệp công nghệ đẩy mạnh ứng dụng trí tuệ nhân tạo trong chăm sóc khách hàng",
+    "Giá xăng dầu được điều chỉnh theo chu kỳ mới ; người dân cần theo dõi thông tin chính thức",
+    "Ngành du lịch phục hồi nhanh sau đại dịch , lượng khách quốc tế tăng đều qua từng tháng"
+]
+
+def synthetic_news(n: int, sentences_per_record: int = 20, seed: int = 42) -> Iterator[RawRecord]:
+    """ 
+    Generate raw news-like records with irregular whitespace and punctuation spacing.
+    @param n (int): Number of records.
+    @param sentences_per_record (int): Sentences per record.
+    @param seed (int): Random seed.
+    @return (Iterator[RawRecord]): Raw (topic, intent, audience, text) tuples. 
+    """
+    rng = random.Random(seed)
+    for _ in range(n):
+        text = " .  ".join(rng.choice(SENTENCES) for _ in range(sentences_per_record)) + " ."
+        yield ("Tin tức tổng hợp", "thuyết minh", "công chúng", text)
+
+def main() -> None:
+    """ 
+    Measure preprocessing throughput (records/sec) for several worker counts. 
+    """
+    parser = argparse.ArgumentParser(description = "Benchmark parallel normalization and chunking.")
+    parser.add_argument("--records", type = int, default = 200_000)
+    parser.add_argument("--workers", type = int, nargs = "+", default = sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument("--shard-size", type = int, default = 256)
+    parser.add_argument("--log-dir", type = Path, default = Path("outputs") / "logs")
+    args = parser.parse_args()
+    for workers in args.workers:
+        t_0 = perf_counter()
+        chunks = 0
+        for rec in preprocess_records(synthetic_news(args.records), workers = workers, shard_size = args.shard_size):
+            chunks += len(rec.chunks)
+        elapsed = perf_counter() - t_0
+        row = {
+            "records": args.records,
+            "workers": workers,
+            "shard_size": args.shard_size,
+            "chunks": chunks,
+            "seconds": round(elapsed, 3),
+            "records_per_sec": round(args.records / elapsed, 1)
+        }
+        append_metric(args.log_dir, "preprocess_benchmark.csv", row)
+        print(", ".join(f"{key}={value}" for key, value in row.items()))
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,20 +1,370 @@
 # Import necessary libraries
+import atexit
+from contextlib import ContextDecorator
+import copy
 import csv
+import io
+import json
+import logging
+import math
 from pathlib import Path
-from typing import Dict
+from queue import Empty, Queue
+from threading import Lock, Thread
+from time import perf_counter, time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Fixed columns of every metric file; rows with unknown columns are rejected instead of silently shifting the header
+SCHEMAS: Dict[str, Tuple[str, ...]] = {
+    "pipeline_times.csv": ("dataset_seconds", "index_seconds", "generation_seconds", "pptx_seconds", "tts_seconds", "total_seconds"),
+    "presentation_stats.csv": ("topic", "intent", "audience", "slides_count", "avg_notes_len_words"),
+    "batch_times.csv": ("decks", "workers", "index_seconds", "generation_seconds", "pptx_seconds", "retrieval_hits", "retrieval_misses", "total_seconds", "decks_per_minute"),
+    "index_benchmark.csv": ("index_type", "n_vectors", "dim", "k", "rescore_factor", "recall_at_k", "p50_ms", "p99_ms", "build_seconds", "index_mb", "bytes_per_vector", "mb_per_million"),
+    "preprocess_benchmark.csv": ("records", "workers", "shard_size", "chunks", "seconds", "records_per_sec")
+}
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, math.inf)
+logger = logging.getLogger(__name__)
+
+def register_schema(filename: str, fields: Sequence[str]) -> None:
+    """ 
+    Declare the columns of a metric file.
+    @param filename (str): CSV filename.
+    @param fields (Sequence[str]): Column names in order. 
+    """
+    SCHEMAS[filename] = tuple(fields)
+
+class MetricsWriter:
+    """ 
+    Buffers metric rows and appends them from a background thread, one write per file and batch.
+
+    Attributes:
+    - max_batch (int): Maximum rows drained from the buffer per write cycle. 
+    """
+
+    def __init__(self, max_batch: int = 1000) -> None:
+        self.max_batch = max_batch
+        self._queue: Queue = Queue()
+        self._thread: Optional[Thread] = None
+        self._checked: Dict[Path, bool] = {}
+        self._lock = Lock()
+
+    def write(self, log_dir: Path, filename: str, row: Dict) -> None:
+        """ 
+        Validate a row against its schema and queue it for writing.
+        @param log_dir (Path): Directory to store logs.
+        @param filename (str): CSV filename registered in SCHEMAS.
+        @param row (Dict): Metric data as key-value mapping; missing columns are left empty. 
+        """
+        fields = SCHEMAS.get(filename)
+        if fields is None:
+            raise ValueError(f"No schema registered for '{filename}'.")
+        unknown = set(row) - set(fields)
+        if unknown:
+            raise ValueError(f"Unknown columns {sorted(unknown)} for '{filename}', expected {list(fields)}.")
+        self._queue.put((log_dir / filename, fields, dict(row)))
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = Thread(target = self._run, name = "metrics-writer", daemon = True)
+                self._thread.start()
+
+    def flush(self) -> None:
+        """ 
+        Block until every queued row is on disk. 
+        """
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+    def _run(self) -> None:
+        """ 
+        Writer loop: drain whatever is queued and append it grouped by file. 
+        """
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except Empty:
+                    break
+            try:
+                groups: Dict[Path, List] = {}
+                for path, fields, row in batch:
+                    groups.setdefault(path, [fields, []])[1].append(row)
+                for path, (fields, rows) in groups.items():
+                    # A bad row or file only loses its own group; the thread must survive for later writes and 'flush'
+                    try:
+                        self._append(path, fields, rows)
+                    except Exception:
+                        logger.exception("Failed to write %d metric rows to %s", len(rows), path)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _append(self, path: Path, fields: Tuple[str, ...], rows: List[Dict]) -> None:
+        """ 
+        Append rows with a single write so concurrent writers do not interleave within a row.
+        @param path (Path): CSV file.
+        @param fields (Tuple[str, ...]): Schema columns.
+        @param rows (List[Dict]): Rows to append. 
+        """
+        path.parent.mkdir(parents = True, exist_ok = True)
+        if path not in self._checked and path.exists():
+            with path.open("r", encoding = "utf-8", newline = "") as f:
+                header = next(csv.reader(f), [])
+            if tuple(header) != fields:
+                # Keep the old data readable under its own header instead of mixing schemas in one file
+                path.replace(path.with_name(f"{path.stem}.{int(time())}{path.suffix}"))
+        self._checked[path] = True
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames = list(fields), restval = "")
+        if not path.exists():
+            writer.writeheader()
+        writer.writerows(rows)
+        with path.open("a", encoding = "utf-8", newline = "") as f:
+            f.write(buffer.getvalue())
+
+_WRITER = MetricsWriter()
+atexit.register(_WRITER.flush)
 
 def append_metric(log_dir: Path, filename: str, row: Dict) -> None:
     """ 
-    Append a metric row to a CSV file, creating headers if needed.
+    Append a metric row to a CSV file, creating headers if needed; the write happens in the background.
     @param log_dir (Path): Directory to store logs.
-    @param filename (str): CSV filename.
+    @param filename (str): CSV filename, registered in SCHEMAS.
     @param row (Dict): Metric data as key-value mapping. 
     """
-    path = log_dir / filename
-    path.parent.mkdir(parents = True, exist_ok = True)
-    write_header = not path.exists()
-    with path.open("a", encoding = "utf-8", newline = "") as f:
-        writer = csv.DictWriter(f, fieldnames = list(row.keys()))
-        if write_header:
-            writer.writeheader()
-        writer.writerow(row)
\ No newline at end of file
+    _WRITER.write(log_dir, filename, row)
+
+def flush_metrics() -> None:
+    """ 
+    Wait until all appended metric rows are written. 
+    """
+    _WRITER.flush()
+
+class Histogram:
+    """ 
+    Cumulative-bucket latency histogram, one series per label set.
+
+    Attributes:
+    - name (str): Metric name.
+    - description (str): Help text for exports.
+    - buckets (Tuple[float, ...]): Upper bounds in seconds, ending with infinity. 
+    """
+
+    def __init__(self, name: str, description: str = "", buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets)) if math.inf in buckets else tuple(sorted(buckets)) + (math.inf,)
+        self._series: Dict[Tuple, List] = {}
+        self._lock = Lock()
+
+    def observe(self, value: float, count: int = 1, **labels: str) -> None:
+        """ 
+        Record one sample, or several samples of the same value.
+        @param value (float): Observed value in seconds.
+        @param count (int): Number of samples (in example, one per query of a batch).
+        @param labels (str): Series labels (in example, stage = 'pptx'). 
+        """
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += count
+                    break
+            series[1] += value * count
+            series[2] += count
+
+    def snapshot(self) -> List[Dict]:
+        """ 
+        Copy of every series.
+        @return (List[Dict]): Rows with 'labels', cumulative 'buckets', 'sum' and 'count'. 
+        """
+        with self._lock:
+            series = [(dict(key), list(counts), total, count) for key, (counts, total, count) in self._series.items()]
+        rows: List[Dict] = []
+        for labels, counts, total, count in series:
+            cumulative, running = [], 0
+            for c in counts:
+                running += c
+                cumulative.append(running)
+            rows.append({"labels": labels, "buckets": list(zip(self.buckets, cumulative)), "sum": total, "count": count})
+        return rows
+
+    def quantile(self, q: float, **labels: str) -> float:
+        """ 
+        Estimate a quantile as the upper bound of the bucket holding it.
+        @param q (float): Quantile in [0, 1].
+        @param labels (str): Series labels.
+        @return (float): Estimated value, NaN when the series is empty. 
+        """
+        for row in self.snapshot():
+            if row["labels"] == labels and row["count"]:
+                rank = q * row["count"]
+                return next(bound for bound, cumulative in row["buckets"] if cumulative >= rank)
+        return math.nan
+
+class MetricsRegistry:
+    """ 
+    Process-wide histograms and gauges with CSV, Parquet and Prometheus text export. 
+    """
+
+    def __init__(self) -> None:
+        self._histograms: Dict[str, Histogram] = {}
+        self._gauges: Dict[str, Dict[Tuple, float]] = {}
+        self._lock = Lock()
+
+    def histogram(self, name: str, description: str = "", buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """ 
+        Get or create a histogram.
+        @param name (str): Metric name.
+        @param description (str): Help text, used on creation.
+        @param buckets (Sequence[float]): Bucket bounds, used on creation.
+        @return (Histogram): The histogram. 
+        """
+        with self._lock:
+            hist = self._histograms.get(name)
+            if hist is None:
+                hist = self._histograms[name] = Histogram(name, description, buckets)
+            return hist
+
+    def observe(self, name: str, value: float, count: int = 1, **labels: str) -> None:
+        """ 
+        Record samples in a histogram, creating it with default buckets if needed.
+        @param name (str): Metric name.
+        @param value (float): Observed value in seconds.
+        @param count (int): Number of samples of this value.
+        @param labels (str): Series labels. 
+        """
+        self.histogram(name).observe(value, count = count, **labels)
+
+    def set_gauge(self, name: str, value: float, **labels: str) -> None:
+        """ 
+        Set the current value of a gauge.
+        @param name (str): Metric name.
+        @param value (float): Current value.
+        @param labels (str): Series labels. 
+        """
+        with self._lock:
+            self._gauges.setdefault(name, {})[tuple(sorted(labels.items()))] = value
+
+    def rows(self) -> List[Dict]:
+        """ 
+        Flatten histograms into one row per series for tabular export.
+        @return (List[Dict]): Rows with 'metric', 'labels', 'count', 'sum', 'mean', 'p50', 'p95' and 'p99'. 
+        """
+        with self._lock:
+            histograms = list(self._histograms.values())
+        rows: List[Dict] = []
+        for hist in histograms:
+            for series in hist.snapshot():
+                labels = series["labels"]
+                rows.append({
+                    "metric": hist.name,
+                    "labels": json.dumps(labels, sort_keys = True, ensure_ascii = False),
+                    "count": series["count"],
+                    "sum": round(series["sum"], 6),
+                    "mean": round(series["sum"] / series["count"], 6) if series["count"] else 0.0,
+                    "p50": hist.quantile(0.5, **labels),
+                    "p95": hist.quantile(0.95, **labels),
+                    "p99": hist.quantile(0.99, **labels)
+                })
+        return rows
+
+    def prometheus_text(self) -> str:
+        """ 
+        Render every metric in the Prometheus text exposition format.
+        @return (str): Exposition text. 
+        """
+        def fmt_labels(labels: Dict, extra: Optional[Tuple[str, str]] = None) -> str:
+            items = list(labels.items()) + ([extra] if extra else [])
+            if not items:
+                return ""
+            escaped = [(k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for k, v in items]
+            return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+        with self._lock:
+            histograms = list(self._histograms.values())
+            gauges = {name: dict(series) for name, series in self._gauges.items()}
+        lines: List[str] = []
+        for hist in histograms:
+            lines.append(f"# HELP {hist.name} {hist.description or hist.name}")
+            lines.append(f"# TYPE {hist.name} histogram")
+            for series in hist.snapshot():
+                for bound, cumulative in series["buckets"]:
+                    le = "+Inf" if math.isinf(bound) else repr(bound)
+                    lines.append(f"{hist.name}_bucket{fmt_labels(series['labels'], ('le', le))} {cumulative}")
+                lines.append(f"{hist.name}_sum{fmt_labels(series['labels'])} {series['sum']}")
+                lines.append(f"{hist.name}_count{fmt_labels(series['labels'])} {series['count']}")
+        for name, series in gauges.items():
+            lines.append(f"# TYPE {name} gauge")
+            for key, value in series.items():
+                lines.append(f"{name}{fmt_labels(dict(key))} {value}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: Path) -> Path:
+        """ 
+        Write a snapshot of the histograms; the format follows the suffix (.csv, .parquet, or .prom for Prometheus text).
+        @param path (Path): Destination file.
+        @return (Path): Written file. 
+        """
+        path.parent.mkdir(parents = True, exist_ok = True)
+        suffix = path.suffix.lower()
+        if suffix == ".prom":
+            path.write_text(self.prometheus_text(), encoding = "utf-8")
+        elif suffix == ".parquet":
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError as e:
+                raise RuntimeError("Parquet export requires 'pyarrow' (pip install pyarrow).") from e
+            pq.write_table(pa.Table.from_pylist(self.rows()), str(path))
+        elif suffix == ".csv":
+            rows = self.rows()
+            with path.open("w", encoding = "utf-8", newline = "") as f:
+                writer = csv.DictWriter(f, fieldnames = ["metric", "labels", "count", "sum", "mean", "p50", "p95", "p99"])
+                writer.writeheader()
+                writer.writerows(rows)
+        else:
+            raise ValueError(f"Unsupported export format '{path.suffix}', expected .csv, .parquet or .prom.")
+        return path
+
+REGISTRY = MetricsRegistry()
+
+class Span(ContextDecorator):
+    """ 
+    Times a block or function and records the duration in a registry histogram.
+
+    Attributes:
+    - metric (str): Histogram name.
+    - labels (Dict[str, str]): Series labels.
+    - seconds (float): Duration of the last completed block. 
+    """
+
+    def __init__(self, metric: str, registry: Optional[MetricsRegistry] = None, **labels: str) -> None:
+        self.metric = metric
+        self.labels = labels
+        self.seconds = 0.0
+        self._registry = registry if registry is not None else REGISTRY
+        self._start = 0.0
+
+    def _recreate_cm(self) -> "Span":
+        # Each decorated call gets its own timer, so concurrent calls do not share a start time
+        return copy.copy(self)
+
+    def __enter__(self) -> "Span":
+        self._start = perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        self.seconds = perf_counter() - self._start
+        self._registry.observe(self.metric, self.seconds, **self.labels)
+        return False
+
+def span(metric: str, **labels: str) -> Span:
+    """ 
+    Time a block ('with span(...) as s') or a function ('@span(...)') into a REGISTRY histogram.
+    @param metric (str): Histogram name (in example, 'stage_seconds').
+    @param labels (str): Series labels (in example, stage = 'pptx').
+    @return (Span): Context manager and decorator; 'seconds' holds the measured duration. 
+    """
+    return Span(metric, **labels)
\ No newline at end of file
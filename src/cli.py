@@ -0,0 +1,219 @@
+# Import necessary libraries
+import argparse
+from config import AppConfig
+import json
+from pathlib import Path
+import subprocess
+import sys
+from typing import Dict, List, Optional, Tuple
+
+# Every subcommand imports what it needs inside its handler: loading FAISS, torch or python-pptx for
+# 'outputs' or a health probe would cost seconds, so this module only depends on the standard library and config
+DEFAULT_TOPIC = "Khai phá dữ liệu"
+DEFAULT_INTENT = "giảng dạy"
+DEFAULT_AUDIENCE = "sinh viên"
+IMPORT_REPORT_MODULES = ["cli", "config", "data_pipeline", "embedding_index", "rag_generator", "pptx_builder", "tts_service", "main", "job_service", "drupal_api"]
+
+def _load_index(cfg: AppConfig):
+    """ 
+    Load the cached index, building the dataset and index first if needed.
+    @param cfg (AppConfig): Paths and index settings.
+    @return (EmbeddingIndex): Ready index. 
+    """
+    from data_pipeline import DATASET_FILENAME
+    from main import dataset_stage, index_stage
+    dataset_path = cfg.data_dir / DATASET_FILENAME
+    if not dataset_path.exists():
+        dataset_path = dataset_stage(cfg.data_dir, cfg.min_samples, cfg.preprocess_workers, cfg.download_limit, cfg.download_concurrency, cfg.dedup_threshold)["dataset_path"]
+    return index_stage(dataset_path, cfg.index_dir, cfg.index_params(), cfg.embed_batch_size)["index"]
+
+def _slides(args: argparse.Namespace, cfg: AppConfig) -> List[Dict]:
+    """ 
+    Read slides from '--slides-file', or generate them from the topic options.
+    @param args (argparse.Namespace): Parsed arguments.
+    @param cfg (AppConfig): Paths and index settings.
+    @return (List[Dict]): Slides with 'title', 'bullets', 'notes'. 
+    """
+    if args.slides_file is not None:
+        return json.loads(args.slides_file.read_text(encoding = "utf-8"))
+    from rag_generator import generate_slides_with_notes
+    return generate_slides_with_notes(index = _load_index(cfg), topic = args.topic, intent = args.intent, audience = args.audience, n_slides = args.slides)
+
+def cmd_dataset(args: argparse.Namespace, cfg: AppConfig) -> None:
+    """ 
+    Build or download the dataset. 
+    """
+    from data_pipeline import build_dataset
+    dedup_threshold = None if args.no_dedup else cfg.dedup_threshold
+    path = build_dataset(data_dir = cfg.data_dir, min_samples = cfg.min_samples, workers = cfg.preprocess_workers, limit = max(cfg.min_samples, cfg.download_limit), concurrency = cfg.download_concurrency, dedup_threshold = dedup_threshold)
+    print(f"Dataset saved to: {path}")
+
+def cmd_index(args: argparse.Namespace, cfg: AppConfig) -> None:
+    """ 
+    Build, update or load the embedding index. 
+    """
+    index = _load_index(cfg)
+    print(f"Index ready: {index.index.ntotal} vectors ({cfg.index_type}) in {cfg.index_dir}")
+
+def cmd_generate(args: argparse.Namespace, cfg: AppConfig) -> None:
+    """ 
+    Generate slides and speaker notes and write them as JSON. 
+    """
+    from rag_generator import generate_slides_with_notes
+    slides = generate_slides_with_notes(index = _load_index(cfg), topic = args.topic, intent = args.intent, audience = args.audience, n_slides = args.slides)
+    args.out.parent.mkdir(parents = True, exist_ok = True)
+    args.out.write_text(json.dumps(slides, ensure_ascii = False, indent = 2), encoding = "utf-8")
+    print(f"{len(slides)} slides saved to: {args.out}")
+
+def cmd_pptx(args: argparse.Namespace, cfg: AppConfig) -> None:
+    """ 
+    Build a PowerPoint deck from a slides file or freshly generated slides. 
+    """
+    slides = _slides(args, cfg)
+    from pptx_builder import build_presentation
+    path = build_presentation(slides = slides, out_path = args.out, title = args.title or cfg.presentation_title)
+    print(f"Presentation saved to: {path}")
+
+def cmd_tts(args: argparse.Namespace, cfg: AppConfig) -> None:
+    """ 
+    Narrate every slide of a slides file or freshly generated slides. 
+    """
+    slides = _slides(args, cfg)
+    from tts_service import synthesize_slide_audio
+    paths = synthesize_slide_audio(slides = slides, out_dir = args.out_dir, language = cfg.language, backend = args.backend or cfg.tts_backend, workers = cfg.tts_workers, cache_dir = cfg.tts_cache_dir)
+    print(f"{len(paths)} audio files saved to: {args.out_dir}")
+
+def cmd_serve(args: argparse.Namespace, cfg: AppConfig) -> None:
+    """ 
+    Warm the generation service and serve the HTTP API. 
+    """
+    from drupal_api import create_app
+    create_app().run(host = args.host, port = args.port, threaded = True)
+
+def cmd_batch(args: argparse.Namespace, cfg: AppConfig) -> None:
+    """ 
+    Generate one deck per job in a CSV or JSONL file. 
+    """
+    from batch_runner import run_batch
+    run_batch(args.jobs, workers = args.workers, out_dir = args.out_dir)
+
+def cmd_outputs(args: argparse.Namespace, cfg: AppConfig) -> None:
+    """ 
+    List generated files without loading any model or index. 
+    """
+    from output_manifest import OutputManifest
+    manifest = OutputManifest(cfg.outputs_dir)
+    manifest.refresh()
+    items, _ = manifest.page(limit = args.limit, prefix = args.prefix)
+    for item in items:
+        print(f"{item['size']:>12}  {item['path']}")
+
+def import_times(module: str, cwd: Optional[Path] = None) -> Tuple[float, List[Tuple[float, str]]]:
+    """ 
+    Measure how long importing a module takes in a fresh interpreter, using '-X importtime'.
+    @param module (str): Module to import.
+    @param cwd (Optional[Path]): Directory to run in, defaults to this file's directory.
+    @return (Tuple[float, List[Tuple[float, str]]]): Total milliseconds and (cumulative ms, name) of the modules it imports directly. 
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd = str(cwd or Path(__file__).resolve().parent), capture_output = True, text = True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing '{module}' failed: {result.stderr.strip().splitlines()[-1]}")
+    total = 0.0
+    direct: List[Tuple[float, str]] = []
+    # Nested imports are listed before their importer and indented by two spaces per level
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        name = name.rstrip()[1:]
+        ms = int(cumulative) / 1000.0
+        if not name.startswith(" "):
+            if name == module:
+                total = ms
+                break
+            direct = []
+        elif not name.startswith("   "):
+            direct.append((ms, name.strip()))
+    return total, direct
+
+def cmd_import_times(args: argparse.Namespace, cfg: AppConfig) -> None:
+    """ 
+    Report the import cost of each module and its heaviest dependencies. 
+    """
+    for module in args.modules or IMPORT_REPORT_MODULES:
+        try:
+            total, direct = import_times(module)
+        except RuntimeError as e:
+            print(f"{module:<16} error: {e}")
+            continue
+        heaviest = sorted(direct, reverse = True)[:args.top]
+        print(f"{module:<16} {total:8.1f} ms  " + ", ".join(f"{name} {ms:.0f} ms" for ms, name in heaviest))
+
+def add_topic_args(parser: argparse.ArgumentParser) -> None:
+    """ 
+    Add the presentation topic options shared by 'generate', 'pptx' and 'tts'.
+    @param parser (argparse.ArgumentParser): Subcommand parser. 
+    """
+    parser.add_argument("--topic", default = DEFAULT_TOPIC)
+    parser.add_argument("--intent", default = DEFAULT_INTENT)
+    parser.add_argument("--audience", default = DEFAULT_AUDIENCE)
+    parser.add_argument("--slides", type = int, default = 10, help = "Number of slides to generate.")
+
+def build_parser() -> argparse.ArgumentParser:
+    """ 
+    Declare the subcommands and their options.
+    @return (argparse.ArgumentParser): Command line parser. 
+    """
+    parser = argparse.ArgumentParser(description = "Vietnamese presentation generator.")
+    subparsers = parser.add_subparsers(dest = "command", required = True)
+    dataset = subparsers.add_parser("dataset", help = "Build or download the dataset.")
+    dataset.add_argument("--no-dedup", action = "store_true", help = "Keep duplicate chunks.")
+    dataset.set_defaults(handler = cmd_dataset)
+    subparsers.add_parser("index", help = "Build or update the embedding index.").set_defaults(handler = cmd_index)
+    generate = subparsers.add_parser("generate", help = "Generate slides and speaker notes as JSON.")
+    add_topic_args(generate)
+    generate.add_argument("--out", type = Path, default = Path("outputs") / "slides.json")
+    generate.set_defaults(handler = cmd_generate)
+    pptx = subparsers.add_parser("pptx", help = "Build a PowerPoint deck.")
+    add_topic_args(pptx)
+    pptx.add_argument("--slides-file", type = Path, default = None, help = "Slides JSON from 'generate'; generated from the topic options if omitted.")
+    pptx.add_argument("--title", default = "")
+    pptx.add_argument("--out", type = Path, default = Path("outputs") / "presentation_auto_generated.pptx")
+    pptx.set_defaults(handler = cmd_pptx)
+    tts = subparsers.add_parser("tts", help = "Narrate every slide.")
+    add_topic_args(tts)
+    tts.add_argument("--slides-file", type = Path, default = None, help = "Slides JSON from 'generate'; generated from the topic options if omitted.")
+    tts.add_argument("--backend", default = None, help = "TTS backend, defaults to the configured one.")
+    tts.add_argument("--out-dir", type = Path, default = Path("outputs") / "audio")
+    tts.set_defaults(handler = cmd_tts)
+    serve = subparsers.add_parser("serve", help = "Serve the HTTP API.")
+    serve.add_argument("--host", default = "0.0.0.0")
+    serve.add_argument("--port", type = int, default = 8000)
+    serve.set_defaults(handler = cmd_serve)
+    batch = subparsers.add_parser("batch", help = "Generate many decks from a CSV/JSONL job file.")
+    batch.add_argument("jobs", type = Path)
+    batch.add_argument("--workers", type = int, default = None)
+    batch.add_argument("--out-dir", type = Path, default = None)
+    batch.set_defaults(handler = cmd_batch)
+    outputs = subparsers.add_parser("outputs", help = "List generated files.")
+    outputs.add_argument("--prefix", default = "")
+    outputs.add_argument("--limit", type = int, default = 100)
+    outputs.set_defaults(handler = cmd_outputs)
+    imports = subparsers.add_parser("import-times", help = "Report module import costs measured with -X importtime.")
+    imports.add_argument("modules", nargs = "*")
+    imports.add_argument("--top", type = int, default = 3, help = "Heaviest dependencies shown per module.")
+    imports.set_defaults(handler = cmd_import_times)
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """ 
+    Command line entry point.
+    @param argv (Optional[List[str]]): Arguments, defaults to sys.argv. 
+    """
+    args = build_parser().parse_args(argv)
+    cfg = AppConfig()
+    cfg.ensure_dirs()
+    args.handler(args, cfg)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,6 +1,7 @@
 # Import necessary libraries
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Dict, Optional
 
 @dataclass
 class AppConfig:
@@ -11,6 +12,29 @@ class AppConfig:
     - data_dir (Path): Directory to store datasets.
     - outputs_dir (Path): Directory to store generated outputs (pptx, audio, logs).
     - logs_dir (Path): Directory to store pipeline logs.
+    - index_dir (Path): Directory to persist the FAISS index and embeddings between runs.
+    - index_type (str): FAISS index family: 'flat' (exact), 'ivf_flat', 'hnsw', 'ivf_pq', or the scalar-quantized 'sq8', 'sq_fp16' and 'ivf_sq8'.
+    - ivf_nlist (int): Number of IVF inverted lists for 'ivf_flat' and 'ivf_pq'.
+    - pq_m (int): Number of PQ sub-quantizers for 'ivf_pq'.
+    - hnsw_m (int): Number of graph neighbours per node for 'hnsw'.
+    - nprobe (int): IVF lists visited per query (higher is slower and more accurate).
+    - ef_search (int): HNSW candidate list size per query (higher is slower and more accurate).
+    - embeddings_mode (str): Full-precision vectors kept in 'ram', memory-mapped ('mmap') or left on disk ('none').
+    - rescore_factor (int): Re-rank top_k * rescore_factor compressed-index candidates with exact scores (1 disables).
+    - embed_batch_size (int): Number of chunks encoded and indexed at a time; bounds peak memory.
+    - preprocess_workers (int): Processes used to normalize and chunk records (1 runs in-process).
+    - download_limit (int): Maximum number of news records to download.
+    - download_concurrency (int): Maximum dataset pages fetched at the same time.
+    - dataset_max_age (Optional[float]): Seconds the pipeline reuses a built dataset before downloading again (None reuses it until its settings or file change).
+    - dedup_threshold (Optional[float]): Shingle similarity at which chunks of the same topic, intent and audience are dropped as near-duplicates (1.0 only drops exact copies, None disables deduplication).
+    - tts_backend (str): Registered text-to-speech backend ('gtts', 'pyttsx3' or 'null').
+    - tts_workers (int): Maximum slides synthesized at the same time.
+    - tts_cache_dir (Path): Content-addressed narration cache shared by the pipeline, the CLI and every service job.
+    - state_path (Path): Fingerprints and outputs of the last successful run of each pipeline stage.
+    - pipeline_workers (int): Maximum pipeline stages running at the same time.
+    - service_workers (int): Generation jobs the HTTP service runs at the same time.
+    - service_queue_size (int): Jobs allowed to wait for a service worker before submissions are rejected.
+    - service_job_ttl (float): Seconds after which a service job's output directory may be deleted by any service process starting up.
     - min_samples (int): Minimum number of samples required in the dataset.
     - language (str): Language code for processing and text-to-speech.
     - presentation_title (str): Default presentation title.
@@ -18,10 +42,40 @@ class AppConfig:
     data_dir: Path = Path("data")
     outputs_dir: Path = Path("outputs")
     logs_dir: Path = outputs_dir / "logs"
+    index_dir: Path = data_dir / "index_cache"
+    index_type: str = "flat"
+    ivf_nlist: int = 256
+    pq_m: int = 16
+    hnsw_m: int = 32
+    nprobe: int = 16
+    ef_search: int = 64
+    embeddings_mode: str = "mmap"
+    rescore_factor: int = 1
+    embed_batch_size: int = 256
+    preprocess_workers: int = 1
+    download_limit: int = 150
+    download_concurrency: int = 4
+    dataset_max_age: Optional[float] = 24 * 3600.0
+    dedup_threshold: Optional[float] = 0.8
+    tts_backend: str = "gtts"
+    tts_workers: int = 4
+    tts_cache_dir: Path = outputs_dir / ".tts_cache"
+    state_path: Path = data_dir / "pipeline_state.json"
+    pipeline_workers: int = 2
+    service_workers: int = 2
+    service_queue_size: int = 32
+    service_job_ttl: float = 24 * 3600.0
     min_samples: int = 100
     language: str = "vi"
     presentation_title: str = "Tự động tạo bài thuyết trình tiếng Việt"
 
+    def index_params(self) -> Dict:
+        """ 
+        Keyword arguments for EmbeddingIndex derived from this configuration.
+        @return (Dict): Index type and its build and search parameters. 
+        """
+        return {"index_type": self.index_type, "nlist": self.ivf_nlist, "pq_m": self.pq_m, "hnsw_m": self.hnsw_m, "nprobe": self.nprobe, "ef_search": self.ef_search, "embeddings_mode": self.embeddings_mode, "rescore_factor": self.rescore_factor}
+
     def ensure_dirs(self) -> None:
         """ 
         Ensure required directories exist.
@@ -1,9 +1,17 @@
 # Import necessary libraries
-import json
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataset_store import write_store
+from dedup import MinHasher, NearDuplicateFilter, Sketch, dedup_records
 from pathlib import Path
-import requests
-from typing import List
-from utils import normalize_vi_text, set_seed
+from typing import Iterable, Iterator, List, Optional, Tuple
+from utils import batched, normalize_vi_text, set_seed
+
+# Raw (topic, intent, audience, text) tuple consumed by the preprocessing stage
+RawRecord = Tuple[str, str, str, str]
+# Character range [start, end) of a chunk within its record text
+Span = Tuple[int, int]
+DATASET_FILENAME = "viet_presentation_dataset.pack"
 
 class DatasetRecord:
     """ 
@@ -13,16 +21,59 @@ class DatasetRecord:
     - topic (str): The topic of the content (in example, 'Chuyển đổi số').
     - intent (str): The intent (in example, 'giảng dạy', 'bán hàng').
     - audience (str): Target audience (in example, 'sinh viên', 'quản lý').
-    - text (str): Raw Vietnamese text content.
-    - chunks (List[str]): Chunked segments for RAG retrieval.
+    - text (str): Normalized Vietnamese text content.
+    - spans (List[Span]): Character ranges of the chunks in 'text', used for RAG retrieval.
+    - sketches (Optional[List[Sketch]]): Deduplication sketch per span, filled by preprocessing workers and consumed by 'dedup_records'. 
     """
 
-    def __init__(self, topic: str, intent: str, audience: str, text: str, chunks: List[str]) -> None:
+    def __init__(self, topic: str, intent: str, audience: str, text: str, spans: List[Span], sketches: Optional[List[Sketch]] = None) -> None:
         self.topic = topic
         self.intent = intent
         self.audience = audience
         self.text = text
-        self.chunks = chunks
+        self.spans = spans
+        self.sketches = sketches
+
+    @property
+    def chunks(self) -> List[str]:
+        """ 
+        Chunk texts, sliced from 'text' on demand.
+        @return (List[str]): Chunked segments for RAG retrieval. 
+        """
+        return [self.text[start:end] for start, end in self.spans]
+
+def chunk_spans(text: str, max_len: int = 400) -> List[Span]:
+    """ 
+    Group consecutive sentences into chunks of at most 'max_len' characters, returned as ranges of the text.
+    A single sentence longer than 'max_len' becomes its own chunk.
+    @param text (str): Normalized input text.
+    @param max_len (int): Maximum characters per chunk.
+    @return (List[Span]): Character ranges [start, end) of the chunks. 
+    """
+    spans: List[Span] = []
+    chunk_start = chunk_end = -1
+    pos = 0
+    while pos < len(text):
+        cut = text.find(". ", pos)
+        # A sentence keeps its period; the following space is the separator
+        start, end = pos, (len(text) if cut < 0 else cut + 1)
+        pos = len(text) if cut < 0 else cut + 2
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if end - start == 0 or text[start:end] == ".":
+            continue
+        if chunk_start < 0:
+            chunk_start, chunk_end = start, end
+        elif end - chunk_start <= max_len:
+            chunk_end = end
+        else:
+            spans.append((chunk_start, chunk_end))
+            chunk_start, chunk_end = start, end
+    if chunk_start >= 0:
+        spans.append((chunk_start, chunk_end))
+    return spans
 
 def chunk_text(text: str, max_len: int = 400) -> List[str]:
     """ 
@@ -31,22 +82,48 @@ def chunk_text(text: str, max_len: int = 400) -> List[str]:
     @param max_len (int): Maximum characters per chunk.
     @return (List[str]): List of text chunks. 
     """
-    sentences = text.split(". ")
-    chunks: List[str] = []
-    current = ""
-    for s in sentences:
-        s = s.strip()
-        if not s:
-            continue
-        if len(current) + len(s) + 1 <= max_len:
-            current = (current + " " + s).strip()
-        else:
-            if current:
-                chunks.append(normalize_vi_text(current + "."))
-            current = s
-    if current:
-        chunks.append(normalize_vi_text(current + "."))
-    return chunks
+    return [normalize_vi_text(text[start:end]) for start, end in chunk_spans(text, max_len = max_len)]
+
+def _preprocess_shard(shard: List[RawRecord], max_len: int, hasher: Optional[MinHasher] = None) -> List[DatasetRecord]:
+    """ 
+    Normalize and chunk a shard of raw records; runs inside worker processes.
+    @param shard (List[RawRecord]): Raw (topic, intent, audience, text) tuples.
+    @param max_len (int): Maximum characters per chunk.
+    @param hasher (Optional[MinHasher]): Also sketch every chunk for deduplication.
+    @return (List[DatasetRecord]): Records that produced at least one chunk, in input order. 
+    """
+    records: List[DatasetRecord] = []
+    for topic, intent, audience, text in shard:
+        text = normalize_vi_text(text)
+        spans = chunk_spans(text, max_len = max_len)
+        if spans:
+            sketches = [hasher.sketch(text[start:end]) for start, end in spans] if hasher is not None else None
+            records.append(DatasetRecord(topic, intent, audience, text, spans, sketches))
+    return records
+
+def preprocess_records(raw: Iterable[RawRecord], workers: int = 1, shard_size: int = 256, max_len: int = 400, hasher: Optional[MinHasher] = None) -> Iterator[DatasetRecord]:
+    """ 
+    Normalize and chunk raw records, sharded across a process pool with ordered output.
+    @param raw (Iterable[RawRecord]): Raw (topic, intent, audience, text) tuples; consumed lazily.
+    @param workers (int): Number of worker processes, 1 to run in the current process.
+    @param shard_size (int): Number of records sent to a worker at a time.
+    @param max_len (int): Maximum characters per chunk.
+    @param hasher (Optional[MinHasher]): Deduplication sketcher run in the workers, None to skip sketching.
+    @return (Iterator[DatasetRecord]): Preprocessed records in input order. 
+    """
+    if workers <= 1:
+        for shard in batched(raw, shard_size):
+            yield from _preprocess_shard(shard, max_len, hasher)
+        return
+    with ProcessPoolExecutor(max_workers = workers) as pool:
+        pending = deque()
+        for shard in batched(raw, shard_size):
+            pending.append(pool.submit(_preprocess_shard, shard, max_len, hasher))
+            # Bound the shards in flight so memory stays flat; draining from the left keeps input order
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
 
 def synthesize_samples(n: int = 120) -> List[DatasetRecord]:
     """ 
@@ -54,11 +131,18 @@ def synthesize_samples(n: int = 120) -> List[DatasetRecord]:
     @param n (int): Number of samples to synthesize.
     @return (List[DatasetRecord]): Generated dataset records. 
     """
+    return list(iter_synthetic_samples(n = n))
+
+def iter_synthetic_samples(n: int = 120) -> Iterator[DatasetRecord]:
+    """ 
+    Lazily create synthetic Vietnamese samples, one record at a time.
+    @param n (int): Number of samples to synthesize.
+    @return (Iterator[DatasetRecord]): Generated dataset records. 
+    """
     set_seed(42)
     topics = ["Chuyển đổi số", "Khởi nghiệp", "AI trong giáo dục", "Marketing số", "Thương mại điện tử", "Phân tích dữ liệu"]
     intents = ["giảng dạy", "thuyết minh", "bán hàng"]
     audiences = ["sinh viên", "quản lý", "công chúng"]
-    records: List[DatasetRecord] = []
     for i in range(n):
         topic = topics[i % len(topics)]
         intent = intents[i % len(intents)]
@@ -69,58 +153,84 @@ def synthesize_samples(n: int = 120) -> List[DatasetRecord]:
             f"Mục tiêu của nội dung này là {intent} và làm rõ các lợi ích, thách thức, cùng ví dụ thực tế. "
             f"Chúng ta sẽ xem xét chiến lược, công cụ, dữ liệu, và cách đánh giá hiệu quả."
         )
-        chunks = chunk_text(text, max_len = 350)
-        records.append(DatasetRecord(topic, intent, audience, text, chunks))
-    return records
+        yield DatasetRecord(topic, intent, audience, text, chunk_spans(text, max_len = 350))
 
-def download_uits_vienews(limit: int = 150) -> List[DatasetRecord]:
+def iter_uits_vienews(limit: int = 150, workers: int = 1, cache_dir: Optional[Path] = None, concurrency: int = 4, page_size: int = 100, hasher: Optional[MinHasher] = None) -> Iterator[DatasetRecord]:
     """ 
-    Attempt to download UIT ViNews dataset via Hugging Face API (public). Fallback if not available.
+    Stream UIT ViNews records from the Hugging Face datasets-server API, page by page.
     @param limit (int): Max number of samples to fetch.
-    @return (List[DatasetRecord]): Parsed dataset records. 
+    @param workers (int): Number of preprocessing processes.
+    @param cache_dir (Optional[Path]): Page cache directory so interrupted downloads resume.
+    @param concurrency (int): Maximum pages fetched at the same time.
+    @param page_size (int): Rows per request.
+    @param hasher (Optional[MinHasher]): Deduplication sketcher run alongside preprocessing.
+    @return (Iterator[DatasetRecord]): Parsed dataset records; raises DownloadError on failure. 
     """
-    url = "https://datasets-server.huggingface.co/rows?dataset=uitnlp%2Fuit-vienews&config=default&split=train&offset=0&length=200"
-    records: List[DatasetRecord] = []
-    try:
-        resp = requests.get(url, timeout = 30)
-        resp.raise_for_status()
-        data = resp.json()
-        rows = data.get("rows", [])[:limit]
-        for r in rows:
-            obj = r.get("row", {})
-            text = obj.get("text", "")
-            text = normalize_vi_text(text)
-            # Heuristics for topic/intent/audience
-            topic = "Tin tức tổng hợp"
-            intent = "thuyết minh"
-            audience = "công chúng"
-            chunks = chunk_text(text, max_len = 400)
-            if chunks:
-                records.append(DatasetRecord(topic, intent, audience, text, chunks))
-    except Exception:
-        # Return empty to signal fallback
-        return []
-    return records
+    # Imported here so offline commands do not pay for loading 'requests'
+    from dataset_downloader import iter_dataset_rows
+    rows = iter_dataset_rows("uitnlp/uit-vienews", limit = limit, page_size = page_size, concurrency = concurrency, cache_dir = cache_dir)
+    # Heuristics for topic/intent/audience
+    raw = (("Tin tức tổng hợp", "thuyết minh", "công chúng", row.get("text", "")) for row in rows)
+    yield from preprocess_records(raw, workers = workers, max_len = 400, hasher = hasher)
+
+def download_uits_vienews(limit: int = 150, workers: int = 1, cache_dir: Optional[Path] = None) -> List[DatasetRecord]:
+    """ 
+    Download UIT ViNews dataset via Hugging Face API (public).
+    @param limit (int): Max number of samples to fetch.
+    @param workers (int): Number of preprocessing processes.
+    @param cache_dir (Optional[Path]): Page cache directory so interrupted downloads resume.
+    @return (List[DatasetRecord]): Parsed dataset records; raises DownloadError on failure. 
+    """
+    return list(iter_uits_vienews(limit = limit, workers = workers, cache_dir = cache_dir))
 
-def build_dataset(data_dir: Path, min_samples: int = 100) -> Path:
+def write_records(records: Iterable[DatasetRecord], out_path: Path) -> int:
     """ 
-    Build or download the dataset and persist as JSONL.
+    Stream dataset records to the packed columnar dataset file as they are produced.
+    @param records (Iterable[DatasetRecord]): Records to persist; consumed once.
+    @param out_path (Path): Destination dataset file.
+    @return (int): Number of records written. 
+    """
+    return write_store(records, out_path)
+
+def build_dataset(data_dir: Path, min_samples: int = 100, workers: int = 1, limit: Optional[int] = None, concurrency: int = 4, dedup_threshold: Optional[float] = 0.8) -> Path:
+    """ 
+    Build or download the dataset and persist it in the packed columnar layout.
     @param data_dir (Path): Directory to store dataset file.
-    @param min_samples (int): Minimum required samples.
-    @return (Path): Path to the JSONL dataset file.
+    @param min_samples (int): Minimum downloaded samples (counted before deduplication) below which synthetic samples are used instead.
+    @param workers (int): Number of preprocessing processes.
+    @param limit (Optional[int]): Max number of news samples to download, defaults to max(min_samples, 150).
+    @param concurrency (int): Maximum dataset pages fetched at the same time.
+    @param dedup_threshold (Optional[float]): Similarity at which chunks with the same topic, intent and audience are near-duplicates (1.0 removes exact copies only, None keeps everything).
+    @return (Path): Path to the dataset file. 
     """
-    out_path = data_dir / "viet_presentation_dataset.jsonl"
-    records = download_uits_vienews(limit = max(min_samples, 150))
-    if len(records) < min_samples:
-        synth = synthesize_samples(n = max(min_samples, 120))
-        records = synth
-    with out_path.open("w", encoding = "utf-8") as f:
+    from dataset_downloader import DownloadError
+    out_path = data_dir / DATASET_FILENAME
+    tmp_path = out_path.with_suffix(".pack.tmp")
+    limit = limit if limit is not None else max(min_samples, 150)
+    dup_filter = NearDuplicateFilter(threshold = dedup_threshold) if dedup_threshold is not None else None
+    downloaded = 0
+    def counted(records: Iterable[DatasetRecord]) -> Iterator[DatasetRecord]:
+        nonlocal downloaded
         for rec in records:
-            f.write(json.dumps({
-                "topic": rec.topic,
-                "intent": rec.intent,
-                "audience": rec.audience,
-                "text": rec.text,
-                "chunks": rec.chunks
-            }, ensure_ascii = False) + "\n")
+            downloaded += 1
+            yield rec
+    # Near-duplicate sketches are computed in the preprocessing workers; the filter itself only does lookups
+    hasher = dup_filter.hasher if dup_filter is not None and not dup_filter.exact_only else None
+    records = counted(iter_uits_vienews(limit = limit, workers = workers, cache_dir = data_dir / "download_cache", concurrency = concurrency, hasher = hasher))
+    try:
+        # Records go to disk as pages arrive; pages are cached so a failed run resumes where it stopped
+        count = write_records(records if dup_filter is None else dedup_records(records, dup_filter), tmp_path)
+    except DownloadError as e:
+        print(f"Dataset download failed, using synthetic samples instead: {e}")
+        downloaded = 0
+    if downloaded < min_samples:
+        # Synthetic samples exist to guarantee 'min_samples'; their templated texts would collapse under deduplication
+        count = write_records(iter_synthetic_samples(n = max(min_samples, 120)), tmp_path)
+    elif dup_filter is not None:
+        stats = dup_filter.stats()
+        print(f"Deduplication kept {stats['kept']} chunks in {count} records, removed {stats['exact_removed']} exact and {stats['near_removed']} near-duplicate chunks")
+    if count < min_samples:
+        print(f"Warning: the dataset has {count} records after deduplication, fewer than min_samples ({min_samples})")
+    # Swap in the finished file so readers never see a partially written dataset
+    tmp_path.replace(out_path)
     return out_path
\ No newline at end of file
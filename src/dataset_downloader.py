@@ -0,0 +1,109 @@
+# Import necessary libraries
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import json
+from pathlib import Path
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Dict, Iterator, List, Optional
+from urllib3.util.retry import Retry
+
+DATASETS_SERVER_URL = "https://datasets-server.huggingface.co/rows"
+# The datasets-server API refuses pages longer than 100 rows
+MAX_PAGE_SIZE = 100
+
+class DownloadError(RuntimeError):
+    """ 
+    Raised when a dataset page cannot be fetched after all retries. 
+    """
+
+def make_session(retries: int = 4, backoff: float = 0.5, pool_size: int = 8) -> requests.Session:
+    """ 
+    Create a pooled HTTP session that retries transient failures with exponential backoff.
+    @param retries (int): Maximum retries per request.
+    @param backoff (float): Backoff factor in seconds (0.5 waits 0.5s, 1s, 2s, ...).
+    @param pool_size (int): Maximum kept-alive connections per host.
+    @return (requests.Session): Configured session. 
+    """
+    retry = Retry(total = retries, backoff_factor = backoff, status_forcelist = (429, 500, 502, 503, 504), allowed_methods = ("GET",), respect_retry_after_header = True)
+    adapter = HTTPAdapter(max_retries = retry, pool_connections = pool_size, pool_maxsize = pool_size)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def fetch_page(session: requests.Session, base_url: str, params: Dict, cache_dir: Optional[Path], timeout: float = 30.0) -> List[Dict]:
+    """ 
+    Fetch one page of rows, serving it from the on-disk page cache when already downloaded.
+    @param session (requests.Session): Pooled HTTP session.
+    @param base_url (str): Rows endpoint of the datasets-server API.
+    @param params (Dict): Query parameters including 'offset' and 'length'.
+    @param cache_dir (Optional[Path]): Directory of cached pages, None to disable caching.
+    @param timeout (float): Per-request timeout in seconds.
+    @return (List[Dict]): Row payloads of the page. 
+    """
+    cache_path = cache_dir / f"page_{params['offset']:09d}_{params['length']}.json" if cache_dir is not None else None
+    if cache_path is not None and cache_path.exists():
+        with cache_path.open("r", encoding = "utf-8") as f:
+            return json.load(f)
+    try:
+        resp = session.get(base_url, params = params, timeout = timeout)
+        resp.raise_for_status()
+        rows = [r.get("row", {}) for r in resp.json().get("rows", [])]
+    except (requests.RequestException, ValueError) as e:
+        raise DownloadError(f"Failed to fetch rows at offset {params['offset']}: {e}") from e
+    # Short pages mark the current end of the dataset; leave them uncached so growth is picked up
+    if cache_path is not None and len(rows) == params["length"]:
+        # Write then rename so an interrupted run never leaves a truncated page behind
+        tmp_path = cache_path.with_suffix(".tmp")
+        with tmp_path.open("w", encoding = "utf-8") as f:
+            json.dump(rows, f, ensure_ascii = False)
+        tmp_path.replace(cache_path)
+    return rows
+
+def iter_dataset_rows(dataset: str, limit: int, config: str = "default", split: str = "train", page_size: int = MAX_PAGE_SIZE, concurrency: int = 4, cache_dir: Optional[Path] = None, base_url: str = DATASETS_SERVER_URL, session: Optional[requests.Session] = None) -> Iterator[Dict]:
+    """ 
+    Page through a dataset on the datasets-server API with bounded concurrency, yielding rows in order.
+    @param dataset (str): Dataset identifier (in example, 'uitnlp/uit-vienews').
+    @param limit (int): Maximum number of rows to yield.
+    @param config (str): Dataset configuration name.
+    @param split (str): Dataset split.
+    @param page_size (int): Rows per request, capped at the API maximum.
+    @param concurrency (int): Maximum pages fetched at the same time.
+    @param cache_dir (Optional[Path]): Directory caching each fetched page, enabling resume.
+    @param base_url (str): Rows endpoint, overridable for mirrors or a local stub server.
+    @param session (Optional[requests.Session]): Session to reuse, a pooled retrying one by default.
+    @return (Iterator[Dict]): Row payloads in dataset order. 
+    """
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    if cache_dir is not None:
+        cache_dir = cache_dir / dataset.replace("/", "__") / config / split
+        cache_dir.mkdir(parents = True, exist_ok = True)
+    own_session = session is None
+    session = session or make_session(pool_size = concurrency)
+    offsets = iter(range(0, limit, page_size))
+    remaining = limit
+    try:
+        with ThreadPoolExecutor(max_workers = concurrency) as pool:
+            pending = deque()
+            def submit_next() -> None:
+                offset = next(offsets, None)
+                if offset is not None:
+                    params = {"dataset": dataset, "config": config, "split": split, "offset": offset, "length": min(page_size, limit - offset)}
+                    pending.append((params["length"], pool.submit(fetch_page, session, base_url, params, cache_dir)))
+            for _ in range(concurrency):
+                submit_next()
+            while pending and remaining > 0:
+                requested, future = pending.popleft()
+                rows = future.result()
+                yield from rows[:remaining]
+                remaining -= len(rows)
+                if len(rows) < requested:
+                    # Short page: the dataset ended, so drop requests for offsets past it
+                    for _, f in pending:
+                        f.cancel()
+                    break
+                submit_next()
+    finally:
+        if own_session:
+            session.close()
\ No newline at end of file
@@ -0,0 +1,277 @@
+# Import necessary libraries
+from array import array
+import json
+import numpy as np
+from pathlib import Path
+import struct
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+# Packed layout: MAGIC, record texts (UTF-8), aligned arrays, JSON footer, footer length (u64), MAGIC
+MAGIC = b"VPDS01\n\0"
+STORE_FORMAT = 1
+SECTION_ALIGN = 64
+CODED_FIELDS = ("topic", "intent", "audience")
+
+class ChunkColumns:
+    """ 
+    Array-backed chunk metadata: chunk text lives once in a byte buffer and categorical fields are dictionary-encoded.
+
+    Attributes:
+    - text (np.ndarray): UTF-8 bytes (uint8) holding every chunk, usually memory-mapped.
+    - spans (np.ndarray): Byte range [start, end) of each chunk in 'text', shape (n, 2).
+    - codes (np.ndarray): Dictionary code of each CODED_FIELDS value per chunk, shape (n, 3).
+    - vocab (Dict[str, List[str]]): Values of each coded field, indexed by code. 
+    """
+
+    def __init__(self, text: np.ndarray, spans: np.ndarray, codes: np.ndarray, vocab: Dict[str, List[str]]) -> None:
+        self.text = text
+        self.spans = spans
+        self.codes = codes
+        self.vocab = vocab
+
+    @classmethod
+    def empty(cls) -> "ChunkColumns":
+        """ 
+        Columns without any chunk.
+        @return (ChunkColumns): Empty columns. 
+        """
+        return cls(np.empty(0, dtype = np.uint8), np.empty((0, 2), dtype = np.int64), np.empty((0, len(CODED_FIELDS)), dtype = np.int32), {field: [] for field in CODED_FIELDS})
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+    def chunk(self, row: int) -> str:
+        """ 
+        Decode the text of one chunk.
+        @param row (int): Row number.
+        @return (str): Chunk text. 
+        """
+        start, end = self.spans[row]
+        return self.text[start:end].tobytes().decode("utf-8")
+
+    def row(self, row: int) -> Dict:
+        """ 
+        Materialize one chunk as a dict, for search results.
+        @param row (int): Row number.
+        @return (Dict): 'topic', 'intent', 'audience' and 'chunk'. 
+        """
+        item = {field: self.vocab[field][code] for field, code in zip(CODED_FIELDS, self.codes[row].tolist())}
+        item["chunk"] = self.chunk(row)
+        return item
+
+    def iter_chunks(self, rows: Optional[Sequence[int]] = None) -> Iterator[str]:
+        """ 
+        Decode chunk texts lazily.
+        @param rows (Optional[Sequence[int]]): Row numbers, all rows by default.
+        @return (Iterator[str]): Chunk texts in row order. 
+        """
+        for row in (range(len(self)) if rows is None else rows):
+            yield self.chunk(row)
+
+    def take(self, rows: np.ndarray) -> "ChunkColumns":
+        """ 
+        Select rows; the text buffer is shared, not copied.
+        @param rows (np.ndarray): Row numbers to keep, in the wanted order.
+        @return (ChunkColumns): Selected rows. 
+        """
+        return ChunkColumns(self.text, np.asarray(self.spans)[rows], np.asarray(self.codes)[rows], self.vocab)
+
+    def concat(self, other: "ChunkColumns") -> "ChunkColumns":
+        """ 
+        Append the rows of other columns, re-mapping their codes onto this vocabulary.
+        @param other (ChunkColumns): Rows to append.
+        @return (ChunkColumns): New compacted columns. 
+        """
+        left = self.compact()
+        right = other.compact()
+        vocab = {field: list(values) for field, values in left.vocab.items()}
+        codes = np.array(right.codes, dtype = np.int32)
+        for f, field in enumerate(CODED_FIELDS):
+            lookup = {value: code for code, value in enumerate(vocab[field])}
+            remap = np.array([lookup.setdefault(value, len(lookup)) for value in right.vocab[field]] or [0], dtype = np.int32)
+            vocab[field] = list(lookup)
+            if len(codes):
+                codes[:, f] = remap[codes[:, f]]
+        text = np.concatenate([left.text, right.text])
+        spans = np.concatenate([left.spans, right.spans + len(left.text)])
+        return ChunkColumns(text, spans, np.concatenate([left.codes, codes]), vocab)
+
+    def compact(self) -> "ChunkColumns":
+        """ 
+        Copy the referenced chunk bytes into a contiguous buffer in row order, dropping everything else.
+        @return (ChunkColumns): Columns whose text holds exactly the chunks. 
+        """
+        spans = np.asarray(self.spans)
+        lengths = spans[:, 1] - spans[:, 0]
+        ends = np.cumsum(lengths)
+        if len(spans) and int(spans[0, 0]) == 0 and np.array_equal(spans[:, 1], ends) and len(self.text) == int(ends[-1]):
+            return self
+        text = np.empty(int(ends[-1]) if len(ends) else 0, dtype = np.uint8)
+        starts = ends - lengths
+        for (s, e), out in zip(spans.tolist(), starts.tolist()):
+            text[out:out + e - s] = self.text[s:e]
+        return ChunkColumns(text, np.stack([starts, ends], axis = 1), np.asarray(self.codes), self.vocab)
+
+    def save(self, directory: Path, prefix: str) -> None:
+        """ 
+        Persist compacted columns as '<prefix>_text.bin', '<prefix>_spans.npy', '<prefix>_codes.npy' and '<prefix>_vocab.json'.
+        @param directory (Path): Destination directory.
+        @param prefix (str): File name prefix. 
+        """
+        paths = {name: directory / f"{prefix}_{name}" for name in ("text.bin", "spans.npy", "codes.npy", "vocab.json")}
+        if all(_maps_file(arr, paths[name]) for arr, name in ((self.text, "text.bin"), (self.spans, "spans.npy"), (self.codes, "codes.npy"))):
+            # Loaded from these very files and unchanged since
+            return
+        cols = self.compact()
+        # Written aside and swapped in, so files that are still memory-mapped are never truncated under a reader
+        tmp = {name: path.with_name(path.name + ".tmp") for name, path in paths.items()}
+        np.asarray(cols.text, dtype = np.uint8).tofile(tmp["text.bin"])
+        with tmp["spans.npy"].open("wb") as f:
+            np.save(f, np.asarray(cols.spans, dtype = np.int64))
+        with tmp["codes.npy"].open("wb") as f:
+            np.save(f, np.asarray(cols.codes, dtype = np.int32))
+        with tmp["vocab.json"].open("w", encoding = "utf-8") as f:
+            json.dump(cols.vocab, f, ensure_ascii = False)
+        for name, path in paths.items():
+            tmp[name].replace(path)
+
+    @classmethod
+    def load(cls, directory: Path, prefix: str) -> "ChunkColumns":
+        """ 
+        Memory-map columns written by 'save'.
+        @param directory (Path): Directory holding the files.
+        @param prefix (str): File name prefix.
+        @return (ChunkColumns): Memory-mapped columns. 
+        """
+        text_path = directory / f"{prefix}_text.bin"
+        text = np.memmap(text_path, dtype = np.uint8, mode = "r") if text_path.stat().st_size else np.empty(0, dtype = np.uint8)
+        with (directory / f"{prefix}_vocab.json").open("r", encoding = "utf-8") as f:
+            vocab = json.load(f)
+        return cls(text, np.load(directory / f"{prefix}_spans.npy", mmap_mode = "r"), np.load(directory / f"{prefix}_codes.npy", mmap_mode = "r"), vocab)
+
+def _maps_file(arr: np.ndarray, path: Path) -> bool:
+    """ 
+    Check whether an array is a memory map of the given file.
+    @param arr (np.ndarray): Array to inspect.
+    @param path (Path): Candidate backing file.
+    @return (bool): True if 'arr' is backed by 'path'. 
+    """
+    base = arr
+    while not isinstance(base, np.memmap) and isinstance(getattr(base, "base", None), np.ndarray):
+        base = base.base
+    return isinstance(base, np.memmap) and base.filename is not None and path.exists() and Path(base.filename).resolve() == path.resolve()
+
+def write_store(records: Iterable, out_path: Path) -> int:
+    """ 
+    Stream records into the packed columnar dataset file.
+    Record texts are stored once; chunks are byte ranges into them and categorical fields are dictionary-encoded.
+    @param records (Iterable): DatasetRecord-like objects with 'topic', 'intent', 'audience', 'text' and character 'spans'; consumed once.
+    @param out_path (Path): Destination file.
+    @return (int): Number of records written. 
+    """
+    lookup: Dict[str, Dict[str, int]] = {field: {} for field in CODED_FIELDS}
+    record_spans = array("q")
+    record_codes = array("i")
+    chunk_spans = array("q")
+    chunk_codes = array("i")
+    chunk_records = array("i")
+    count = 0
+    with out_path.open("wb") as f:
+        f.write(MAGIC)
+        pos = len(MAGIC)
+        for rec in records:
+            data = rec.text.encode("utf-8")
+            codes = [lookup[field].setdefault(getattr(rec, field), len(lookup[field])) for field in CODED_FIELDS]
+            record_spans.extend((pos, pos + len(data)))
+            record_codes.extend(codes)
+            # Character spans become byte offsets; spans are ordered, so each prefix is encoded once
+            char_pos, byte_pos = 0, pos
+            for start, end in rec.spans:
+                byte_pos += len(rec.text[char_pos:start].encode("utf-8"))
+                byte_end = byte_pos + len(rec.text[start:end].encode("utf-8"))
+                chunk_spans.extend((byte_pos, byte_end))
+                chunk_codes.extend(codes)
+                chunk_records.append(count)
+                char_pos, byte_pos = end, byte_end
+            f.write(data)
+            pos += len(data)
+            count += 1
+        text_length = pos - len(MAGIC)
+        sections: Dict[str, Dict] = {}
+        for name, values, width, dtype in (
+            ("record_spans", record_spans, 2, "<i8"),
+            ("record_codes", record_codes, len(CODED_FIELDS), "<i4"),
+            ("chunk_spans", chunk_spans, 2, "<i8"),
+            ("chunk_codes", chunk_codes, len(CODED_FIELDS), "<i4"),
+            ("chunk_records", chunk_records, 1, "<i4")
+        ):
+            padding = -pos % SECTION_ALIGN
+            f.write(b"\0" * padding)
+            pos += padding
+            arr = np.array(values, dtype = dtype).reshape(-1, width) if width > 1 else np.array(values, dtype = dtype)
+            f.write(arr.tobytes())
+            sections[name] = {"offset": pos, "dtype": dtype, "shape": list(arr.shape)}
+            pos += arr.nbytes
+        footer = json.dumps({
+            "format": STORE_FORMAT,
+            "records": count,
+            "chunks": len(chunk_records),
+            "text": {"offset": len(MAGIC), "length": text_length},
+            "sections": sections,
+            "vocab": {field: list(values) for field, values in lookup.items()}
+        }, ensure_ascii = False).encode("utf-8")
+        f.write(footer)
+        f.write(struct.pack("<Q", len(footer)))
+        f.write(MAGIC)
+    return count
+
+class DatasetStore:
+    """ 
+    Memory-mapped reader of a packed dataset file written by 'write_store'.
+
+    Attributes:
+    - path (Path): Dataset file.
+    - vocab (Dict[str, List[str]]): Values of each coded field, indexed by code.
+    - num_records (int): Number of records.
+    - num_chunks (int): Number of chunks. 
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        size = path.stat().st_size
+        tail = len(MAGIC) + 8
+        with path.open("rb") as f:
+            head = f.read(len(MAGIC))
+            f.seek(size - tail)
+            footer_length = struct.unpack("<Q", f.read(8))[0]
+            end_magic = f.read(len(MAGIC))
+            if head != MAGIC or end_magic != MAGIC:
+                raise ValueError(f"{path} is not a packed dataset file.")
+            f.seek(size - tail - footer_length)
+            footer = json.loads(f.read(footer_length).decode("utf-8"))
+        if footer.get("format") != STORE_FORMAT:
+            raise ValueError(f"Unsupported dataset format {footer.get('format')} in {path}.")
+        self._buffer = np.memmap(path, dtype = np.uint8, mode = "r")
+        self._sections = footer["sections"]
+        self.vocab: Dict[str, List[str]] = footer["vocab"]
+        self.num_records = int(footer["records"])
+        self.num_chunks = int(footer["chunks"])
+
+    def _section(self, name: str) -> np.ndarray:
+        """ 
+        Zero-copy view of one array section.
+        @param name (str): Section name.
+        @return (np.ndarray): Memory-mapped array. 
+        """
+        info = self._sections[name]
+        dtype = np.dtype(info["dtype"])
+        count = int(np.prod(info["shape"]))
+        raw = self._buffer[info["offset"]:info["offset"] + count * dtype.itemsize]
+        return raw.view(dtype).reshape(info["shape"])
+
+    def chunk_columns(self) -> ChunkColumns:
+        """ 
+        Chunk metadata as columns over the memory-mapped file, without copying any text.
+        @return (ChunkColumns): Columns whose spans index the whole file. 
+        """
+        return ChunkColumns(self._buffer, self._section("chunk_spans"), self._section("chunk_codes"), self.vocab)
\ No newline at end of file
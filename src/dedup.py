@@ -0,0 +1,224 @@
+# Import necessary libraries
+from hashlib import blake2b
+import numpy as np
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Mersenne prime of the universal hash family (a * x + b) mod p; shingle hashes and coefficients are 61-bit
+MERSENNE_PRIME = (1 << 61) - 1
+_P = np.uint64(MERSENNE_PRIME)
+_MASK_29 = np.uint64((1 << 29) - 1)
+_MASK_32 = np.uint64(0xFFFFFFFF)
+# Metadata a chunk must share with another one to count as its duplicate
+Partition = Tuple[str, str, str]
+# (content hash, LSH band hashes, MinHash signature) of one chunk; the arrays are None for exact-only filtering
+Sketch = Tuple[int, Optional[np.ndarray], Optional[np.ndarray]]
+
+def _fold(text: str) -> str:
+    """ 
+    Canonical form used for comparison: case-folded with whitespace collapsed.
+    @param text (str): Chunk text.
+    @return (str): Folded text. 
+    """
+    return re.sub(r"\s+", " ", text).strip().casefold()
+
+def _hash64(data: bytes) -> int:
+    """ 
+    Unkeyed 64-bit BLAKE2b hash.
+    @param data (bytes): Bytes to hash.
+    @return (int): Unsigned 64-bit hash. 
+    """
+    return int.from_bytes(blake2b(data, digest_size = 8).digest(), "little")
+
+def _mod_p(x: np.ndarray) -> np.ndarray:
+    """ 
+    Reduce values below 2**64 modulo the Mersenne prime 2**61 - 1.
+    @param x (np.ndarray): uint64 values.
+    @return (np.ndarray): uint64 values in [0, p). 
+    """
+    x = (x & _P) + (x >> np.uint64(61))
+    x = (x & _P) + (x >> np.uint64(61))
+    return np.where(x >= _P, x - _P, x)
+
+def _mulmod(a: np.ndarray, x: np.ndarray) -> np.ndarray:
+    """ 
+    Exact (a * x) mod (2**61 - 1) for 61-bit operands without 128-bit integers, splitting both into 32-bit halves.
+    @param a (np.ndarray): uint64 values below p.
+    @param x (np.ndarray): uint64 values below p, broadcast against 'a'.
+    @return (np.ndarray): uint64 products modulo p. 
+    """
+    a_hi, a_lo = a >> np.uint64(32), a & _MASK_32
+    x_hi, x_lo = x >> np.uint64(32), x & _MASK_32
+    # 2**64 = 8 (mod p) and 2**61 = 1 (mod p)
+    high = (a_hi * x_hi) << np.uint64(3)
+    mid = a_hi * x_lo + a_lo * x_hi
+    mid = (mid >> np.uint64(29)) + ((mid & _MASK_29) << np.uint64(32))
+    return _mod_p(high + _mod_p(mid) + _mod_p(a_lo * x_lo))
+
+class MinHasher:
+    """ 
+    Computes the content hash, MinHash signature and LSH band hashes of chunk texts; picklable, so preprocessing workers run it next to chunking.
+
+    Attributes:
+    - num_perm (int): MinHash permutations per signature.
+    - bands (int): LSH bands; num_perm / bands rows per band trade recall against candidate volume.
+    - shingle (int): Characters per shingle. 
+    """
+
+    def __init__(self, num_perm: int = 128, bands: int = 16, shingle: int = 5, seed: int = 42) -> None:
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands}).")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle = shingle
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, MERSENNE_PRIME, size = num_perm, dtype = np.uint64)
+        self._b = rng.integers(0, MERSENNE_PRIME, size = num_perm, dtype = np.uint64)
+        # Random odd multipliers fold each band's rows into one 64-bit key (wrapping arithmetic)
+        self._band_mult = rng.integers(0, 1 << 63, size = self.rows, dtype = np.uint64) * np.uint64(2) + np.uint64(1)
+
+    def signature(self, folded: str) -> np.ndarray:
+        """ 
+        MinHash signature of a text's character shingles.
+        @param folded (str): Folded chunk text.
+        @return (np.ndarray): uint32 signature of length 'num_perm'. 
+        """
+        k = self.shingle
+        shingles = {folded[i:i + k] for i in range(max(1, len(folded) - k + 1))}
+        x = _mod_p(np.fromiter((_hash64(s.encode("utf-8")) for s in shingles), dtype = np.uint64, count = len(shingles)))
+        permuted = _mod_p(_mulmod(self._a, x[:, None]) + self._b)
+        return (permuted.min(axis = 0) & _MASK_32).astype(np.uint32)
+
+    def band_hashes(self, sig: np.ndarray) -> np.ndarray:
+        """ 
+        One 64-bit key per LSH band of a signature.
+        @param sig (np.ndarray): Signature from 'signature'.
+        @return (np.ndarray): uint64 array of length 'bands'. 
+        """
+        return (sig.reshape(self.bands, self.rows).astype(np.uint64) * self._band_mult).sum(axis = 1, dtype = np.uint64)
+
+    def sketch(self, text: str, exact_only: bool = False) -> Sketch:
+        """ 
+        Everything the filter needs to decide about a chunk.
+        @param text (str): Chunk text.
+        @param exact_only (bool): Skip the MinHash work when only exact copies are removed.
+        @return (Sketch): Content hash, band hashes and signature. 
+        """
+        folded = _fold(text)
+        digest = _hash64(folded.encode("utf-8"))
+        if exact_only:
+            return digest, None, None
+        sig = self.signature(folded)
+        return digest, self.band_hashes(sig), sig
+
+class NearDuplicateFilter:
+    """ 
+    Streaming exact and near-duplicate detector for chunk texts: content hashes catch exact copies, MinHash signatures bucketed by LSH bands catch near copies without comparing every pair.
+    Kept signatures live in one growing uint32 matrix and each band maps integer keys to row numbers, so a kept chunk costs about 1.5 KB.
+
+    Attributes:
+    - threshold (float): Estimated Jaccard similarity of character shingles at or above which a chunk is a near-duplicate; 1.0 only removes exact copies.
+    - hasher (MinHasher): Sketch function; pass it to preprocessing workers so they compute sketches in parallel.
+    - exact_removed (int): Chunks dropped because an identical one was already kept.
+    - near_removed (int): Chunks dropped because a near-identical one was already kept.
+    - kept (int): Chunks accepted so far. 
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128, bands: int = 16, shingle: int = 5, seed: int = 42, capacity: int = 1024) -> None:
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm = num_perm, bands = bands, shingle = shingle, seed = seed)
+        self.exact_only = threshold >= 1.0
+        self._min_agree = int(np.ceil(threshold * num_perm))
+        self._partitions: Dict[Partition, int] = {}
+        self._hashes = set()
+        self._buckets: List[Dict[int, int]] = [{} for _ in range(bands)]
+        self._signatures = np.empty((0 if self.exact_only else capacity, num_perm), dtype = np.uint32)
+        self._partition_of = np.empty(0 if self.exact_only else capacity, dtype = np.uint32)
+        self._n = 0
+        self.exact_removed = 0
+        self.near_removed = 0
+        self.kept = 0
+
+    def _salt(self, partition: Partition) -> Tuple[int, int]:
+        """ 
+        Small ID of a partition and the 64-bit salt mixed into its keys.
+        @param partition (Partition): (topic, intent, audience).
+        @return (Tuple[int, int]): Partition ID and salt. 
+        """
+        pid = self._partitions.setdefault(partition, len(self._partitions))
+        return pid, ((pid + 1) * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+
+    def _remember(self, sig: np.ndarray, pid: int) -> int:
+        """ 
+        Store a kept signature, doubling the matrix when it is full.
+        @param sig (np.ndarray): Signature to keep.
+        @param pid (int): Partition ID of the chunk.
+        @return (int): Row of the signature. 
+        """
+        n = self._n
+        if n == len(self._signatures):
+            grow = max(n, 1)
+            self._signatures = np.concatenate([self._signatures, np.empty((grow, self.hasher.num_perm), dtype = np.uint32)])
+            self._partition_of = np.concatenate([self._partition_of, np.empty(grow, dtype = np.uint32)])
+        self._signatures[n] = sig
+        self._partition_of[n] = pid
+        self._n += 1
+        return n
+
+    def is_duplicate(self, text: str, partition: Partition, sketch: Optional[Sketch] = None) -> bool:
+        """ 
+        Check a chunk against the chunks kept so far in the same partition and remember it if it is new.
+        @param text (str): Chunk text.
+        @param partition (Partition): (topic, intent, audience) the chunk belongs to.
+        @param sketch (Optional[Sketch]): Precomputed 'hasher.sketch(text)', computed here when None.
+        @return (bool): True if the chunk should be dropped. 
+        """
+        digest, bands, sig = sketch if sketch is not None else self.hasher.sketch(text, exact_only = self.exact_only)
+        pid, salt = self._salt(partition)
+        if digest ^ salt in self._hashes:
+            self.exact_removed += 1
+            return True
+        self._hashes.add(digest ^ salt)
+        if self.exact_only:
+            self.kept += 1
+            return False
+        keys = (bands ^ np.uint64(salt)).tolist()
+        # Only chunks sharing at least one whole band are compared, which keeps the work close to linear
+        candidates = {self._buckets[band].get(key, -1) for band, key in enumerate(keys)}
+        candidates.discard(-1)
+        if candidates:
+            rows = np.fromiter(candidates, dtype = np.int64, count = len(candidates))
+            agree = np.count_nonzero(self._signatures[rows] == sig, axis = 1)
+            if np.any((agree >= self._min_agree) & (self._partition_of[rows] == pid)):
+                self.near_removed += 1
+                return True
+        n = self._remember(sig, pid)
+        # The first chunk seen in a bucket represents it; later ones only need buckets of their own
+        for band, key in enumerate(keys):
+            self._buckets[band].setdefault(key, n)
+        self.kept += 1
+        return False
+
+    def stats(self) -> Dict[str, int]:
+        """ 
+        Counts of kept and removed chunks.
+        @return (Dict[str, int]): 'kept', 'exact_removed' and 'near_removed'. 
+        """
+        return {"kept": self.kept, "exact_removed": self.exact_removed, "near_removed": self.near_removed}
+
+def dedup_records(records: Iterable, dup_filter: NearDuplicateFilter) -> Iterator:
+    """ 
+    Drop duplicate chunks from a record stream, keeping the first occurrence; records left without chunks are dropped.
+    @param records (Iterable[DatasetRecord]): Records with 'topic', 'intent', 'audience', 'text', 'spans' and, when preprocessed with a hasher, 'sketches'.
+    @param dup_filter (NearDuplicateFilter): Detector holding what has been kept so far, and the removal counts.
+    @return (Iterator[DatasetRecord]): Records with duplicate spans removed. 
+    """
+    for rec in records:
+        partition = (rec.topic, rec.intent, rec.audience)
+        sketches = rec.sketches or [None] * len(rec.spans)
+        spans = [(start, end) for (start, end), sketch in zip(rec.spans, sketches) if not dup_filter.is_duplicate(rec.text[start:end], partition, sketch = sketch)]
+        rec.sketches = None
+        if spans:
+            rec.spans = spans
+            yield rec
\ No newline at end of file
@@ -1,9 +1,34 @@
 # Import necessary libraries
-from flask import Flask, jsonify
+from config import AppConfig
+from flask import Flask, Response, abort, jsonify, request, send_file, url_for
+import hashlib
+from job_service import GenerationService, QueueFullError
+import json
+from output_manifest import OutputManifest, decode_cursor, encode_cursor
 from pathlib import Path
+from threading import Lock
+from typing import Dict, Iterator, List, Optional
 
 app = Flask(__name__)
 OUTPUT_DIR = Path("outputs")
+MANIFEST = OutputManifest(OUTPUT_DIR)
+MAX_PAGE_SIZE = 5000
+_SERVICE: Optional[GenerationService] = None
+_SERVICE_LOCK = Lock()
+
+def get_service() -> GenerationService:
+    """ 
+    Return the process-wide generation service, warming the model and index on first use.
+    @return (GenerationService): Started service. 
+    """
+    global _SERVICE
+    with _SERVICE_LOCK:
+        if _SERVICE is None:
+            cfg = AppConfig()
+            service = GenerationService(cfg, workers = cfg.service_workers, max_queue = cfg.service_queue_size, job_ttl = cfg.service_job_ttl, on_output = MANIFEST.register)
+            service.start()
+            _SERVICE = service
+    return _SERVICE
 
 @app.get("/health")
 def health():
@@ -11,23 +36,130 @@ def health():
     Health check endpoint.
     @return (Response): JSON with status. 
     """
-    return jsonify({"status": "ok"})
+    return jsonify({"status": "ok", "warm": _SERVICE is not None})
+
+def _stream_page(items: List[Dict], next_cursor: Optional[str]) -> Iterator[str]:
+    """ 
+    Serialize a listing page incrementally instead of building one large body.
+    @param items (List[Dict]): Manifest entries.
+    @param next_cursor (Optional[str]): Cursor of the next page.
+    @return (Iterator[str]): JSON fragments. 
+    """
+    yield '{"files": ['
+    for n, item in enumerate(items):
+        yield ("," if n else "") + json.dumps(item, ensure_ascii = False)
+    yield '], "next_cursor": ' + json.dumps(next_cursor) + "}"
 
 @app.get("/outputs")
 def list_outputs():
     """ 
-    List generated files for Drupal to consume.
-    @return (Response): JSON list of files. 
+    List generated files for Drupal to consume, one page at a time.
+    Query parameters: 'cursor' (from the previous page), 'limit', 'prefix' and 'type' (repeatable or comma separated).
+    @return (Response): Streamed JSON with 'files' and 'next_cursor', or 304 when the client's ETag is current. 
+    """
+    try:
+        limit = int(request.args.get("limit", 500))
+        cursor = decode_cursor(request.args["cursor"]) if request.args.get("cursor") else None
+    except ValueError:
+        return jsonify({"error": "Invalid 'limit' or 'cursor'."}), 400
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    prefix = request.args.get("prefix", "")
+    types = {t.strip().lower().lstrip(".") for arg in request.args.getlist("type") for t in arg.split(",") if t.strip()}
+    MANIFEST.refresh()
+    # The page is fully determined by the manifest version and the query, so nothing is listed to answer a revalidation
+    query = json.dumps([cursor, limit, prefix, sorted(types)], ensure_ascii = False)
+    etag = hashlib.sha1(f"{MANIFEST.version}|{query}".encode("utf-8")).hexdigest()
+    if request.if_none_match.contains(etag):
+        return Response(status = 304, headers = {"ETag": f'"{etag}"'})
+    items, last_path = MANIFEST.page(cursor = cursor, limit = limit, prefix = prefix, types = types or None)
+    next_cursor = encode_cursor(last_path) if last_path is not None else None
+    return Response(_stream_page(items, next_cursor), mimetype = "application/json", headers = {"ETag": f'"{etag}"', "Cache-Control": "no-cache"})
+
+@app.post("/jobs")
+def submit_job():
+    """ 
+    Queue a presentation generation job.
+    @return (Response): 202 with the job and its status URL, 400 on invalid input, 503 when the queue is full. 
+    """
+    payload = request.get_json(silent = True)
+    if not isinstance(payload, dict):
+        return jsonify({"error": "Expected a JSON object."}), 400
+    try:
+        job = get_service().submit(payload)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except QueueFullError as e:
+        return jsonify({"error": str(e)}), 503, {"Retry-After": "5"}
+    status_url = url_for("job_status", job_id = job.id)
+    return jsonify(job.to_dict()), 202, {"Location": status_url}
+
+@app.get("/jobs/<job_id>")
+def job_status(job_id: str):
+    """ 
+    Poll a job.
+    @param job_id (str): Job identifier.
+    @return (Response): Job status, with download URLs once done. 
+    """
+    job = get_service().get(job_id)
+    if job is None:
+        abort(404)
+    body = job.to_dict()
+    if job.status == "done":
+        body["pptx_url"] = url_for("job_pptx", job_id = job.id)
+        body["audio_urls"] = [url_for("job_audio", job_id = job.id, slide = n) for n in range(1, len(job.audio_paths) + 1)]
+    return jsonify(body)
+
+@app.get("/jobs/<job_id>/pptx")
+def job_pptx(job_id: str):
+    """ 
+    Download the generated deck.
+    @param job_id (str): Job identifier.
+    @return (Response): The .pptx file, or 409 while the job is not done. 
+    """
+    job = get_service().get(job_id)
+    if job is None:
+        abort(404)
+    if job.status != "done":
+        return jsonify({"error": f"Job is {job.status}."}), 409
+    return send_file(job.pptx_path.resolve(), as_attachment = True, download_name = f"{job.id}.pptx")
+
+@app.get("/jobs/<job_id>/audio/<int:slide>")
+def job_audio(job_id: str, slide: int):
+    """ 
+    Download the narration of one slide.
+    @param job_id (str): Job identifier.
+    @param slide (int): 1-based slide number.
+    @return (Response): The audio file, or 409 while the job is not done. 
+    """
+    job = get_service().get(job_id)
+    if job is None:
+        abort(404)
+    if job.status != "done":
+        return jsonify({"error": f"Job is {job.status}."}), 409
+    if not 1 <= slide <= len(job.audio_paths):
+        abort(404)
+    return send_file(job.audio_paths[slide - 1].resolve(), as_attachment = True)
+
+@app.get("/metrics")
+def metrics():
+    """ 
+    Queue depth, job counters, per-stage latencies and retrieval cache statistics.
+    @return (Response): JSON metrics. 
+    """
+    return jsonify(get_service().metrics())
+
+@app.get("/metrics/prometheus")
+def metrics_prometheus():
+    """ 
+    Queue gauges and latency histograms for a Prometheus scraper.
+    @return (Response): Text exposition format. 
     """
-    files = []
-    for p in OUTPUT_DIR.rglob("*"):
-        if p.is_file():
-            files.append(str(p))
-    return jsonify({"files": files})
+    return Response(get_service().prometheus_text(), mimetype = "text/plain; version=0.0.4")
 
 def create_app() -> Flask:
     """ 
-    Factory to return Flask app instance for WSGI servers.
+    Factory to return Flask app instance for WSGI servers; warms the model and index before serving.
     @return (Flask): Flask app instance. 
     """
+    get_service()
     return app
\ No newline at end of file
@@ -1,9 +1,148 @@
 # Import necessary libraries
+from bi_logging import REGISTRY, span
+from collections import Counter
+from dataset_store import CODED_FIELDS, ChunkColumns, DatasetStore
 import faiss
+import hashlib
 import json
+from model_registry import get_model
+import numpy as np
 from pathlib import Path
-from sentence_transformers import SentenceTransformer
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple, Union
+from utils import file_sha256
+import uuid
+
+INDEX_FILE = "index.faiss"
+EMBEDDINGS_FILE = "embeddings.npy"
+IDS_FILE = "ids.npy"
+KEYS_FILE = "keys.npy"
+META_PREFIX = "meta"
+MANIFEST_FILE = "manifest.json"
+# Bumped when the cached metadata or index layout changes; older caches are rebuilt
+META_FORMAT = 3
+META_FIELDS = ("topic", "intent", "audience", "chunk")
+FILTER_FIELDS = CODED_FIELDS
+Filters = Dict[str, Union[str, List[str]]]
+INDEX_TYPES = ("flat", "ivf_flat", "hnsw", "ivf_pq", "sq8", "sq_fp16", "ivf_sq8")
+# Where full-precision vectors live besides the index: loaded in RAM, memory-mapped from the cache, or only on disk
+EMBEDDINGS_MODES = ("ram", "mmap", "none")
+# FAISS warns below ~39 training points per IVF list and PQ needs 256 points per codebook
+MIN_POINTS_PER_LIST = 39
+MIN_PQ_TRAINING_POINTS = 256
+# Streaming builds train IVF quantizers on a bounded prefix of the corpus
+TRAIN_POINTS_PER_LIST = 100
+# Rows copied at a time when memory-mapped embeddings are rewritten (64K rows of 384 floats is about 100 MB)
+COPY_BLOCK_ROWS = 1 << 16
+
+def make_faiss_index(dim: int, n_train: int, index_type: str = "flat", nlist: int = 256, pq_m: int = 16, hnsw_m: int = 32) -> faiss.Index:
+    """ 
+    Create an empty inner product FAISS index of the requested type.
+    @param dim (int): Embedding dimension.
+    @param n_train (int): Number of vectors available for training, used to cap 'nlist'.
+    @param index_type (str): One of INDEX_TYPES; 'sq8' and 'sq_fp16' scalar-quantize each dimension to 1 or 2 bytes.
+    @param nlist (int): Number of IVF inverted lists (upper bound).
+    @param pq_m (int): Number of PQ sub-quantizers, must divide 'dim'.
+    @param hnsw_m (int): Number of HNSW graph neighbours per node.
+    @return (faiss.Index): Untrained index; call 'train' when 'is_trained' is False. 
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type '{index_type}', expected one of {INDEX_TYPES}.")
+    nlist = max(1, min(nlist, n_train // MIN_POINTS_PER_LIST))
+    if index_type == "ivf_flat":
+        spec = f"IVF{nlist},Flat"
+    elif index_type == "hnsw":
+        spec = f"HNSW{hnsw_m}"
+    elif index_type == "ivf_pq":
+        if dim % pq_m != 0:
+            raise ValueError(f"pq_m = {pq_m} must divide the embedding dimension {dim}.")
+        # Too few vectors to train PQ codebooks: an exact scan is both possible and cheaper
+        spec = f"IVF{nlist},PQ{pq_m}" if n_train >= MIN_PQ_TRAINING_POINTS else "Flat"
+    elif index_type == "sq8":
+        spec = "SQ8"
+    elif index_type == "sq_fp16":
+        spec = "SQfp16"
+    elif index_type == "ivf_sq8":
+        spec = f"IVF{nlist},SQ8"
+    else:
+        spec = "Flat"
+    return faiss.index_factory(dim, spec, faiss.METRIC_INNER_PRODUCT)
+
+def with_ids(base: faiss.Index) -> faiss.Index:
+    """ 
+    Make an index addressable by chunk IDs.
+    @param base (faiss.Index): Index from 'make_faiss_index'.
+    @return (faiss.Index): IVF indexes as they are, other types wrapped in an IndexIDMap. 
+    """
+    # IVF lists store the IDs themselves; behind an IndexIDMap they would hold positions that go stale when 'remove_ids' compacts the map
+    if isinstance(faiss.downcast_index(base), faiss.IndexIVF):
+        return base
+    return faiss.IndexIDMap(base)
+
+def unwrap(index: faiss.Index) -> faiss.Index:
+    """ 
+    Return the index doing the search, below any ID map.
+    @param index (faiss.Index): Index from 'with_ids'.
+    @return (faiss.Index): Downcast underlying index. 
+    """
+    return faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else faiss.downcast_index(index)
+
+def tune_search(index: faiss.Index, nprobe: int = 16, ef_search: int = 64) -> None:
+    """ 
+    Apply query-time accuracy/speed knobs to an IVF or HNSW index, unwrapping ID maps.
+    @param index (faiss.Index): Index to tune in place.
+    @param nprobe (int): Number of IVF lists visited per query.
+    @param ef_search (int): Size of the HNSW candidate list per query. 
+    """
+    base = unwrap(index)
+    if hasattr(base, "nprobe"):
+        base.nprobe = min(nprobe, base.nlist)
+    if hasattr(base, "hnsw"):
+        base.hnsw.efSearch = ef_search
+
+def rescore(query: np.ndarray, rows: np.ndarray, vectors: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """ 
+    Re-rank candidates from a compressed index with exact inner products against full-precision vectors.
+    @param query (np.ndarray): Normalized query vector of shape (dim,).
+    @param rows (np.ndarray): Candidate row numbers in 'vectors'.
+    @param vectors (np.ndarray): Full-precision vectors, typically memory-mapped.
+    @param top_k (int): Number of results to keep.
+    @return (Tuple[np.ndarray, np.ndarray]): Kept rows and their exact scores, best first. 
+    """
+    # Reading rows in file order turns random page faults into mostly sequential ones
+    order = np.argsort(rows, kind = "stable")
+    exact = np.empty(len(rows), dtype = np.float32)
+    exact[order] = np.asarray(vectors[rows[order]], dtype = np.float32) @ query
+    best = np.argsort(-exact, kind = "stable")[:top_k]
+    return rows[best], exact[best]
+
+def copy_rows(dst: np.ndarray, src: np.ndarray, rows: Optional[np.ndarray] = None, offset: int = 0) -> None:
+    """ 
+    Copy rows between possibly memory-mapped matrices in fixed-size blocks, so at most one block is held in RAM.
+    @param dst (np.ndarray): Destination matrix.
+    @param src (np.ndarray): Source matrix.
+    @param rows (Optional[np.ndarray]): Source rows in destination order, all rows by default.
+    @param offset (int): First destination row. 
+    """
+    n = len(src) if rows is None else len(rows)
+    for start in range(0, n, COPY_BLOCK_ROWS):
+        end = min(n, start + COPY_BLOCK_ROWS)
+        dst[offset + start:offset + end] = src[start:end] if rows is None else src[rows[start:end]]
+
+def chunk_keys(meta: ChunkColumns) -> np.ndarray:
+    """ 
+    Compute a stable content key per chunk, disambiguating repeated chunks by occurrence.
+    @param meta (ChunkColumns): Chunk metadata in dataset order.
+    @return (np.ndarray): One fixed-width bytes key per chunk. 
+    """
+    seen: Counter = Counter()
+    keys: List[bytes] = []
+    for row in range(len(meta)):
+        m = meta.row(row)
+        payload = "\x1f".join(m[field] for field in META_FIELDS)
+        digest = hashlib.sha1(payload.encode("utf-8")).hexdigest()[:20]
+        keys.append(f"{digest}:{seen[digest]}".encode("ascii"))
+        seen[digest] += 1
+    return np.array(keys, dtype = "S32")
 
 class EmbeddingIndex:
     """ 
@@ -11,63 +150,406 @@ class EmbeddingIndex:
 
     Attributes:
     - model_name (str): Name of the sentence transformer model.
-    - index (faiss.IndexFlatIP): FAISS index using inner product similarity.
-    - embeddings (np.ndarray): Dense vectors for all chunks.
-    - meta (List[Dict]): Metadata per chunk (topic, intent, audience, text). 
+    - index_type (str): FAISS index family, one of INDEX_TYPES.
+    - index (faiss.Index): FAISS inner product index addressed by stable chunk IDs, see 'with_ids'.
+    - embeddings (Optional[np.ndarray]): Full-precision vectors for all chunks, None when 'embeddings_mode' is 'none'.
+    - embeddings_mode (str): 'ram', 'mmap' (memory-mapped from the cache) or 'none' (kept on disk only).
+    - rescore_factor (int): Fetch top_k * rescore_factor candidates and re-rank them exactly from 'embeddings'; 1 disables it.
+    - meta (ChunkColumns): Metadata per chunk (topic, intent, audience, text) as memory-mappable columns.
+    - ids (np.ndarray): FAISS ID of each row in 'embeddings' and 'meta', strictly increasing.
+    - keys (np.ndarray): Content key of each row, used to detect new and deleted chunks.
+    - dataset_hash (str): Content hash of the dataset the index was built from.
+    - postings (Dict[str, Dict[str, np.ndarray]]): Inverted index from metadata field and value to FAISS IDs. 
     """
 
-    def __init__(self, model_name: str = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2") -> None:
+    def __init__(self, model_name: str = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2", index_type: str = "flat", nlist: int = 256, pq_m: int = 16, hnsw_m: int = 32, nprobe: int = 16, ef_search: int = 64, embeddings_mode: str = "mmap", rescore_factor: int = 1) -> None:
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type '{index_type}', expected one of {INDEX_TYPES}.")
+        if embeddings_mode not in EMBEDDINGS_MODES:
+            raise ValueError(f"Unknown embeddings mode '{embeddings_mode}', expected one of {EMBEDDINGS_MODES}.")
         self.model_name = model_name
+        self.index_type = index_type
+        self.nlist = nlist
+        self.pq_m = pq_m
+        self.hnsw_m = hnsw_m
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        self.embeddings_mode = embeddings_mode
+        self.rescore_factor = max(1, rescore_factor)
         self.index = None
         self.embeddings = None
-        self.meta: List[Dict] = []
-
-    def build(self, dataset_path: Path) -> None:
-        """ 
-        Build FAISS index from dataset.
-        @param dataset_path (Path): Path to dataset JSONL file. 
-        """
-        model = SentenceTransformer(self.model_name)
-        texts: List[str] = []
-        meta: List[Dict] = []
-        with dataset_path.open("r", encoding = "utf-8") as f:
-            for line in f:
-                obj = json.loads(line)
-                for ch in obj.get("chunks", []):
-                    texts.append(ch)
-                    meta.append({
-                        "topic": obj.get("topic", ""),
-                        "intent": obj.get("intent", ""),
-                        "audience": obj.get("audience", ""),
-                        "chunk": ch
-                    })
-        if not texts:
-            raise ValueError("No chunks available to create embeddings.")
+        self.meta = ChunkColumns.empty()
+        self.ids = np.empty(0, dtype = np.int64)
+        self.keys = np.empty(0, dtype = "S32")
+        self.next_id = 0
+        self.dataset_hash = ""
+        self.postings: Dict[str, Dict[str, np.ndarray]] = {}
+
+    @property
+    def version(self) -> str:
+        """ 
+        Cache key identifying the model, index parameters and dataset content behind the index.
+        @return (str): Short hex digest, empty if the index has not been built. 
+        """
+        if not self.dataset_hash:
+            return ""
+        key = f"{self.model_name}\n{self.index_spec}\n{self.dataset_hash}"
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """ 
+        Encode texts into normalized float32 embeddings with the warm model.
+        @param texts (List[str]): Texts to encode.
+        @return (np.ndarray): Embedding matrix of shape (len(texts), dim). 
+        """
+        model = get_model(self.model_name)
         emb = model.encode(texts, convert_to_numpy = True, normalize_embeddings = True)
-        dim = emb.shape[1]
-        index = faiss.IndexFlatIP(dim)
-        index.add(emb)
+        return np.ascontiguousarray(emb, dtype = np.float32)
+
+    @property
+    def index_spec(self) -> str:
+        """ 
+        Build-time index parameters; a cache built with other parameters is rebuilt.
+        @return (str): Compact description of the index type and its parameters. 
+        """
+        return f"{self.index_type}:nlist={self.nlist}:pq_m={self.pq_m}:hnsw_m={self.hnsw_m}"
+
+    def _new_index(self, emb: np.ndarray, ids: np.ndarray) -> faiss.Index:
+        """ 
+        Create, train and fill a FAISS index for the given vectors.
+        @param emb (np.ndarray): Normalized embeddings, also used as training data.
+        @param ids (np.ndarray): FAISS IDs of the rows in 'emb'.
+        @return (faiss.Index): Populated index addressed by 'ids'. 
+        """
+        base = make_faiss_index(emb.shape[1], len(emb), index_type = self.index_type, nlist = self.nlist, pq_m = self.pq_m, hnsw_m = self.hnsw_m)
+        index = with_ids(base)
+        if not index.is_trained:
+            index.train(emb)
+        index.add_with_ids(emb, ids)
+        tune_search(index, nprobe = self.nprobe, ef_search = self.ef_search)
+        return index
+
+    def _reindex_rows(self) -> None:
+        """ 
+        Refresh the metadata postings after rows were added or removed. 
+        """
+        self.postings = {}
+        for f, field in enumerate(FILTER_FIELDS):
+            codes = np.asarray(self.meta.codes[:, f])
+            # A stable sort groups rows by code while keeping their IDs in increasing order
+            order = np.argsort(codes, kind = "stable")
+            values, starts = np.unique(codes[order], return_index = True)
+            groups = np.split(self.ids[order], starts[1:])
+            self.postings[field] = {self.meta.vocab[field][code]: ids for code, ids in zip(values.tolist(), groups)}
+
+    def _rows_of(self, ids: np.ndarray) -> np.ndarray:
+        """ 
+        Map FAISS IDs to row numbers; IDs only ever grow, so 'ids' stays sorted.
+        @param ids (np.ndarray): FAISS IDs present in the index.
+        @return (np.ndarray): Row numbers in 'embeddings' and 'meta'. 
+        """
+        return np.searchsorted(self.ids, ids)
+
+    def select_ids(self, filters: Filters) -> np.ndarray:
+        """ 
+        Resolve metadata filters to the FAISS IDs that satisfy all of them.
+        @param filters (Filters): Field to accepted value (or list of values).
+        @return (np.ndarray): Sorted matching FAISS IDs, possibly empty. 
+        """
+        selected: Optional[np.ndarray] = None
+        for field, accepted in filters.items():
+            if field not in FILTER_FIELDS:
+                raise ValueError(f"Cannot filter on '{field}', expected one of {FILTER_FIELDS}.")
+            values = [accepted] if isinstance(accepted, str) else list(accepted)
+            parts = [self.postings[field][v] for v in values if v in self.postings[field]]
+            matched = np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype = np.int64)
+            selected = matched if selected is None else np.intersect1d(selected, matched, assume_unique = True)
+        return selected if selected is not None else np.sort(self.ids)
+
+    def _search_params(self, selector: faiss.IDSelector) -> faiss.SearchParameters:
+        """ 
+        Build search parameters restricting a query to selected IDs while keeping the tuned knobs.
+        @param selector (faiss.IDSelector): Selector over FAISS IDs.
+        @return (faiss.SearchParameters): Parameters matching the underlying index family. 
+        """
+        base = unwrap(self.index)
+        if isinstance(base, faiss.IndexIVF):
+            return faiss.SearchParametersIVF(sel = selector, nprobe = min(self.nprobe, base.nlist))
+        if isinstance(base, faiss.IndexHNSW):
+            return faiss.SearchParametersHNSW(sel = selector, efSearch = self.ef_search)
+        return faiss.SearchParameters(sel = selector)
+
+    def build(self, dataset_path: Path, batch_size: int = 256, embeddings_path: Optional[Path] = None) -> None:
+        """ 
+        Build FAISS index from dataset, streaming chunks through the encoder in fixed-size batches.
+        @param dataset_path (Path): Path to the packed dataset file.
+        @param batch_size (int): Number of chunks encoded and added to the index at a time.
+        @param embeddings_path (Optional[Path]): Write embeddings to this memory-mapped .npy instead of RAM. 
+        """
+        # Metadata stays a view over the memory-mapped dataset file; nothing is parsed or copied up front
+        meta = DatasetStore(dataset_path).chunk_columns()
+        n = len(meta)
+        if not n:
+            raise ValueError("No chunks available to create embeddings.")
+        dim = get_model(self.model_name).get_sentence_embedding_dimension()
+        if embeddings_path is not None:
+            embeddings_path.parent.mkdir(parents = True, exist_ok = True)
+            emb = np.lib.format.open_memmap(embeddings_path, mode = "w+", dtype = np.float32, shape = (n, dim))
+        else:
+            emb = np.empty((n, dim), dtype = np.float32)
+        ids = np.arange(n, dtype = np.int64)
+        index = with_ids(make_faiss_index(dim, n, index_type = self.index_type, nlist = self.nlist, pq_m = self.pq_m, hnsw_m = self.hnsw_m))
+        train_size = min(n, max(MIN_PQ_TRAINING_POINTS, TRAIN_POINTS_PER_LIST * self.nlist))
+        added = 0
+        for start in range(0, n, batch_size):
+            end = min(n, start + batch_size)
+            emb[start:end] = self.encode(list(meta.iter_chunks(range(start, end))))
+            if not index.is_trained and end >= train_size:
+                index.train(np.ascontiguousarray(emb[:train_size]))
+            # Vectors wait in 'emb' only until the quantizer is trained, then go to FAISS batch by batch
+            if index.is_trained:
+                index.add_with_ids(np.ascontiguousarray(emb[added:end]), ids[added:end])
+                added = end
+        tune_search(index, nprobe = self.nprobe, ef_search = self.ef_search)
         self.index = index
         self.embeddings = emb
         self.meta = meta
+        self.ids = ids
+        self.keys = chunk_keys(meta)
+        self.next_id = n
+        self.dataset_hash = file_sha256(dataset_path)
+        self._reindex_rows()
+
+    def update(self, dataset_path: Path) -> Dict[str, int]:
+        """ 
+        Incrementally sync the index with a changed dataset, embedding only unseen chunks.
+        @param dataset_path (Path): Path to the packed dataset file.
+        @return (Dict[str, int]): Counts of 'added', 'removed' and 'kept' chunks. 
+        """
+        if self.index is None:
+            raise RuntimeError("Index not built.")
+        if self.embeddings is None:
+            raise RuntimeError("Incremental updates need the stored vectors; open them with 'open_embeddings' first.")
+        meta = DatasetStore(dataset_path).chunk_columns()
+        keys = chunk_keys(meta)
+        keep_mask = np.isin(self.keys, keys)
+        removed_ids = self.ids[~keep_mask]
+        new_rows = np.flatnonzero(~np.isin(keys, self.keys))
+        new_ids = np.arange(self.next_id, self.next_id + len(new_rows), dtype = np.int64)
+        if len(new_rows):
+            new_emb = self.encode(list(meta.iter_chunks(new_rows)))
+        else:
+            new_emb = np.empty((0, self.index.d), dtype = np.float32)
+        # Surviving rows keep their IDs and vectors; new rows are appended after them
+        kept_rows = np.flatnonzero(keep_mask)
+        if isinstance(self.embeddings, np.memmap):
+            # Rewritten block by block into a sibling file that 'save' swaps in, so the matrix never has to fit in RAM
+            path = Path(self.embeddings.filename).with_name(f"{EMBEDDINGS_FILE}.{uuid.uuid4().hex[:8]}.update")
+            emb = np.lib.format.open_memmap(path, mode = "w+", dtype = np.float32, shape = (len(kept_rows) + len(new_rows), self.index.d))
+            copy_rows(emb, self.embeddings, kept_rows)
+            copy_rows(emb, new_emb, offset = len(kept_rows))
+            self.embeddings = emb
+        else:
+            self.embeddings = np.concatenate([self.embeddings[kept_rows], new_emb])
+        if removed_ids.size and self.index_type == "hnsw":
+            # HNSW graphs cannot delete nodes, so re-insert the stored vectors without re-encoding
+            self.index = self._new_index(self.embeddings, np.concatenate([self.ids[kept_rows], new_ids]))
+        else:
+            if removed_ids.size:
+                self.index.remove_ids(faiss.IDSelectorBatch(removed_ids))
+            if len(new_rows):
+                self.index.add_with_ids(new_emb, new_ids)
+        self.meta = self.meta.take(kept_rows).concat(meta.take(new_rows))
+        self.keys = np.concatenate([self.keys[kept_rows], keys[new_rows]])
+        self.ids = np.concatenate([self.ids[kept_rows], new_ids])
+        self.next_id += len(new_rows)
+        self.dataset_hash = file_sha256(dataset_path)
+        self._reindex_rows()
+        return {"added": len(new_rows), "removed": int(removed_ids.size), "kept": int(kept_rows.size)}
 
-    def search(self, query: str, top_k: int = 8) -> List[Dict]:
+    def save(self, cache_dir: Path) -> Path:
+        """ 
+        Persist the FAISS index, embedding matrix and metadata to disk.
+        @param cache_dir (Path): Directory to write the cache files into.
+        @return (Path): The cache directory. 
+        """
+        if self.index is None:
+            raise RuntimeError("Index not built.")
+        cache_dir.mkdir(parents = True, exist_ok = True)
+        # Drop the manifest first so an interrupted save is never mistaken for a valid cache
+        (cache_dir / MANIFEST_FILE).unlink(missing_ok = True)
+        faiss.write_index(self.index, str(cache_dir / INDEX_FILE))
+        emb_path = cache_dir / EMBEDDINGS_FILE
+        if self.embeddings is None:
+            if not emb_path.exists():
+                raise RuntimeError("Embeddings were dropped and are not in the target cache directory.")
+        elif isinstance(self.embeddings, np.memmap) and Path(self.embeddings.filename).resolve() == emb_path.resolve():
+            # Streamed straight into the cache file (or loaded from it): nothing to copy
+            self.embeddings.flush()
+        elif isinstance(self.embeddings, np.memmap) and Path(self.embeddings.filename).resolve().parent == cache_dir.resolve():
+            # Rewritten by 'update' next to the cache file: swapping it in is enough
+            self.embeddings.flush()
+            Path(self.embeddings.filename).replace(emb_path)
+            self.embeddings = np.load(emb_path, mmap_mode = "r")
+        else:
+            # Written aside and swapped in, so readers that memory-mapped the old file keep valid pages
+            tmp_path = emb_path.with_name(emb_path.name + ".tmp")
+            out = np.lib.format.open_memmap(tmp_path, mode = "w+", dtype = np.float32, shape = self.embeddings.shape)
+            copy_rows(out, self.embeddings)
+            out.flush()
+            del out
+            tmp_path.replace(emb_path)
+        np.save(cache_dir / IDS_FILE, self.ids)
+        np.save(cache_dir / KEYS_FILE, self.keys)
+        self.meta.save(cache_dir, META_PREFIX)
+        manifest = {
+            "version": self.version,
+            "model_name": self.model_name,
+            "dataset_hash": self.dataset_hash,
+            "count": len(self.meta),
+            "dim": int(self.index.d),
+            "index_spec": self.index_spec,
+            "next_id": self.next_id,
+            "meta_format": META_FORMAT
+        }
+        with (cache_dir / MANIFEST_FILE).open("w", encoding = "utf-8") as f:
+            json.dump(manifest, f, indent = 2)
+        return cache_dir
+
+    def load(self, cache_dir: Path, dataset_hash: Optional[str] = None) -> bool:
+        """ 
+        Load a persisted index if it matches this model and, optionally, a dataset hash.
+        @param cache_dir (Path): Directory written by 'save'.
+        @param dataset_hash (Optional[str]): Expected dataset content hash, None to accept any.
+        @return (bool): True if the cache was valid and has been loaded. 
+        """
+        manifest_path = cache_dir / MANIFEST_FILE
+        if not manifest_path.exists():
+            return False
+        with manifest_path.open("r", encoding = "utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("model_name") != self.model_name or manifest.get("index_spec") != self.index_spec or manifest.get("meta_format") != META_FORMAT:
+            return False
+        if dataset_hash is not None and manifest.get("dataset_hash") != dataset_hash:
+            return False
+        self.meta = ChunkColumns.load(cache_dir, META_PREFIX)
+        self.keys = np.load(cache_dir / KEYS_FILE)
+        self.index = faiss.read_index(str(cache_dir / INDEX_FILE))
+        tune_search(self.index, nprobe = self.nprobe, ef_search = self.ef_search)
+        self.open_embeddings(cache_dir, mode = self.embeddings_mode)
+        self.ids = np.load(cache_dir / IDS_FILE)
+        self.next_id = int(manifest["next_id"])
+        self.dataset_hash = manifest["dataset_hash"]
+        self._reindex_rows()
+        return True
+
+    def open_embeddings(self, cache_dir: Path, mode: str = "mmap") -> None:
+        """ 
+        Attach the full-precision vectors persisted in a cache directory.
+        @param cache_dir (Path): Directory written by 'save'.
+        @param mode (str): 'ram' to load them, 'mmap' to map them lazily, 'none' to release them. 
+        """
+        if mode == "none":
+            self.embeddings = None
+        elif mode == "ram":
+            self.embeddings = np.load(cache_dir / EMBEDDINGS_FILE)
+        else:
+            self.embeddings = np.load(cache_dir / EMBEDDINGS_FILE, mmap_mode = "r")
+
+    def build_or_load(self, dataset_path: Path, cache_dir: Path, incremental: bool = True, batch_size: int = 256) -> bool:
+        """ 
+        Load the cached index for this dataset and model, or build and cache it.
+        @param dataset_path (Path): Packed dataset file written by 'write_records'.
+        @param cache_dir (Path): Directory holding the persisted index.
+        @param incremental (bool): Update a stale cache in place instead of rebuilding from scratch.
+        @param batch_size (int): Number of chunks encoded at a time.
+        @return (bool): True on a warm start (cache hit), False if the index was updated or rebuilt. 
+        """
+        if self.load(cache_dir, dataset_hash = file_sha256(dataset_path)):
+            return True
+        if incremental and self.load(cache_dir):
+            if self.embeddings is None:
+                self.open_embeddings(cache_dir)
+            self.update(dataset_path = dataset_path)
+        else:
+            # The full build streams into the cache's embedding file, so invalidate the cache first
+            (cache_dir / MANIFEST_FILE).unlink(missing_ok = True)
+            self.build(dataset_path = dataset_path, batch_size = batch_size, embeddings_path = cache_dir / EMBEDDINGS_FILE)
+        self.save(cache_dir)
+        # Serve metadata from the cache's own memory-mapped copy rather than holding the dataset file open
+        self.meta = ChunkColumns.load(cache_dir, META_PREFIX)
+        self.open_embeddings(cache_dir, mode = self.embeddings_mode)
+        return False
+
+    def search(self, query: str, top_k: int = 8, filters: Optional[Filters] = None) -> List[Dict]:
         """ 
         Search FAISS index for relevant chunks.
         @param query (str): Query text for retrieval.
         @param top_k (int): Number of top results to fetch.
+        @param filters (Optional[Filters]): Metadata constraints applied before ranking.
         @return (List[Dict]): Retrieved chunks with scores and metadata. 
         """
+        return self.search_many(queries = [query], top_k = top_k, filters = filters)[0]
+
+    def search_many(self, queries: List[str], top_k: int = 8, filters: Union[None, Filters, List[Optional[Filters]]] = None) -> List[List[Dict]]:
+        """ 
+        Search FAISS index for many queries with a single batched encode.
+        @param queries (List[str]): Query texts for retrieval.
+        @param top_k (int): Number of top results to fetch per query.
+        @param filters (Union[None, Filters, List[Optional[Filters]]]): Metadata constraints applied before ranking, shared or one per query.
+        @return (List[List[Dict]]): Retrieved chunks with scores and metadata, one list per query. 
+        """
+        if self.index is None:
+            raise RuntimeError("Index not built.")
+        if not queries:
+            return []
+        # One batch sample per call, plus one per-query sample for each query sharing the batch's cost evenly
+        with span("search_batch_seconds") as timer:
+            results = self.search_embeddings(self.encode(queries), top_k = top_k, filters = filters)
+        REGISTRY.observe("search_query_seconds", timer.seconds / len(queries), count = len(queries))
+        return results
+
+    def search_embeddings(self, q_emb: np.ndarray, top_k: int = 8, filters: Union[None, Filters, List[Optional[Filters]]] = None) -> List[List[Dict]]:
+        """ 
+        Search FAISS index with already encoded queries, grouping queries that share the same filters.
+        @param q_emb (np.ndarray): Normalized query embeddings of shape (n_queries, dim).
+        @param top_k (int): Number of top results to fetch per query.
+        @param filters (Union[None, Filters, List[Optional[Filters]]]): Metadata constraints applied before ranking, shared or one per query.
+        @return (List[List[Dict]]): Retrieved chunks with scores and metadata, one list per query. 
+        """
         if self.index is None:
             raise RuntimeError("Index not built.")
-        model = SentenceTransformer(self.model_name)
-        q_emb = model.encode([query], convert_to_numpy = True, normalize_embeddings = True)
-        scores, idxs = self.index.search(q_emb, top_k)
-        results: List[Dict] = []
-        for rank, i in enumerate(idxs[0]):
-            if (i < 0):
-                continue
-            item = dict(self.meta[i])
-            item["score"] = float(scores[0][rank])
-            results.append(item)
-        return results
\ No newline at end of file
+        per_query = filters if isinstance(filters, list) else [filters] * len(q_emb)
+        if len(per_query) != len(q_emb):
+            raise ValueError("Expected one filter per query.")
+        groups: Dict[str, List[int]] = {}
+        for row, f in enumerate(per_query):
+            groups.setdefault(json.dumps(f or {}, sort_keys = True, ensure_ascii = False), []).append(row)
+        all_results: List[List[Dict]] = [[] for _ in range(len(q_emb))]
+        rescoring = self.rescore_factor > 1 and self.embeddings is not None
+        fetch_k = top_k * self.rescore_factor if rescoring else top_k
+        for rows in groups.values():
+            group_filters = per_query[rows[0]]
+            group_emb = np.ascontiguousarray(q_emb[rows])
+            if group_filters:
+                allowed = self.select_ids(group_filters)
+                if not allowed.size:
+                    continue
+                # The selector makes FAISS skip non-matching IDs during the scan rather than after it
+                selector = faiss.IDSelectorBatch(allowed)
+                scores, idxs = self.index.search(group_emb, min(fetch_k, int(allowed.size)), params = self._search_params(selector))
+            else:
+                scores, idxs = self.index.search(group_emb, min(fetch_k, int(self.index.ntotal)))
+            for j, row in enumerate(rows):
+                results: List[Dict] = []
+                found = idxs[j] >= 0
+                meta_rows, row_scores = self._rows_of(idxs[j][found]), scores[j][found]
+                if rescoring:
+                    # Candidates come from compressed codes; the final order uses exact full-precision scores
+                    meta_rows, row_scores = rescore(group_emb[j], meta_rows, self.embeddings, top_k)
+                for meta_row, score in zip(meta_rows.tolist(), row_scores.tolist()):
+                    item = self.meta.row(meta_row)
+                    item["score"] = score
+                    results.append(item)
+                all_results[row] = results
+        return all_results
\ No newline at end of file
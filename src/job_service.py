@@ -0,0 +1,313 @@
+# Import necessary libraries
+from bi_logging import REGISTRY, span
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from config import AppConfig
+from data_pipeline import DATASET_FILENAME
+from main import dataset_stage, generation_stage, index_stage, pptx_stage, tts_stage
+from pathlib import Path
+from pipeline_dag import Stage, StageGraph
+from rag_generator import RETRIEVAL_CACHE
+import shutil
+from threading import BoundedSemaphore, Lock
+from time import time
+from typing import Callable, Deque, Dict, List, Optional
+import uuid
+
+JOB_STATES = ("queued", "running", "done", "failed")
+
+class QueueFullError(RuntimeError):
+    """ 
+    Raised when a job is submitted while every worker and queue slot is taken. 
+    """
+
+class Job:
+    """ 
+    A single deck generation request and its outcome.
+
+    Attributes:
+    - id (str): Unique job identifier.
+    - params (Dict): 'topic', 'intent', 'audience', 'n_slides', 'title' and 'audio'.
+    - status (str): One of JOB_STATES.
+    - created_at (float): Submission time (epoch seconds).
+    - started_at (Optional[float]): Time a worker picked the job up.
+    - finished_at (Optional[float]): Completion or failure time.
+    - pptx_path (Optional[Path]): Generated deck.
+    - audio_paths (List[Path]): Narration per slide, empty when audio was not requested.
+    - error (Optional[str]): Failure message. 
+    """
+
+    def __init__(self, params: Dict) -> None:
+        self.id = uuid.uuid4().hex
+        self.params = params
+        self.status = "queued"
+        self.created_at = time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.pptx_path: Optional[Path] = None
+        self.audio_paths: List[Path] = []
+        self.error: Optional[str] = None
+
+    def to_dict(self) -> Dict:
+        """ 
+        JSON view of the job for status polling.
+        @return (Dict): Job fields with paths as strings. 
+        """
+        return {
+            "id": self.id,
+            "status": self.status,
+            "params": self.params,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "pptx_path": str(self.pptx_path) if self.pptx_path else None,
+            "audio_count": len(self.audio_paths),
+            "error": self.error
+        }
+
+def validate_params(payload: Dict) -> Dict:
+    """ 
+    Check a job request and fill in defaults.
+    @param payload (Dict): Request body with 'topic', 'intent', 'audience' and optional 'n_slides', 'title', 'audio'.
+    @return (Dict): Normalized job parameters. 
+    """
+    params: Dict = {}
+    for field in ("topic", "intent", "audience"):
+        value = payload.get(field)
+        if not isinstance(value, str) or not value.strip():
+            raise ValueError(f"'{field}' must be a non-empty string.")
+        params[field] = value.strip()
+    n_slides = payload.get("n_slides", 8)
+    if not isinstance(n_slides, int) or isinstance(n_slides, bool) or not 1 <= n_slides <= 50:
+        raise ValueError("'n_slides' must be an integer between 1 and 50.")
+    params["n_slides"] = n_slides
+    params["title"] = str(payload.get("title") or "").strip()
+    params["audio"] = bool(payload.get("audio", True))
+    return params
+
+class GenerationService:
+    """ 
+    Keeps the embedding model and index warm and runs generation jobs on a bounded worker pool.
+
+    Attributes:
+    - cfg (AppConfig): Paths and pipeline settings.
+    - workers (int): Jobs generated at the same time.
+    - max_queue (int): Jobs allowed to wait for a worker; further submissions are rejected.
+    - max_jobs (int): Finished jobs remembered for polling before the oldest are forgotten and their output files deleted.
+    - job_ttl (float): Age in seconds after which job directories left by any process, including earlier runs, are deleted at start-up.
+    - on_output (Optional[Callable[[List[Path]], None]]): Called with the files of each finished job.
+    - index (Optional[EmbeddingIndex]): Warm index, loaded by 'start'. 
+    """
+
+    def __init__(self, cfg: Optional[AppConfig] = None, workers: int = 2, max_queue: int = 32, max_jobs: int = 1000, job_ttl: float = 24 * 3600.0, on_output: Optional[Callable[[List[Path]], None]] = None) -> None:
+        self.cfg = cfg if cfg is not None else AppConfig()
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self.max_jobs = max_jobs
+        self.job_ttl = job_ttl
+        self.on_output = on_output
+        self.index = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+        # One slot per running or waiting job; acquired without blocking so callers get backpressure immediately
+        self._slots = BoundedSemaphore(self.workers + self.max_queue)
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._counts = {"submitted": 0, "rejected": 0, "done": 0, "failed": 0}
+        self._lock = Lock()
+
+    def start(self) -> None:
+        """ 
+        Load the dataset, index and model once, then start the workers. 
+        """
+        if self._pool is not None:
+            return
+        cfg = self.cfg
+        cfg.ensure_dirs()
+        self._expire_job_dirs()
+        with span("service_warmup_seconds") as warmup:
+            dataset_path = cfg.data_dir / DATASET_FILENAME
+            if not dataset_path.exists():
+                dataset_path = dataset_stage(cfg.data_dir, cfg.min_samples, cfg.preprocess_workers, cfg.download_limit, cfg.download_concurrency, cfg.dedup_threshold)["dataset_path"]
+            self.index = index_stage(dataset_path, cfg.index_dir, cfg.index_params(), cfg.embed_batch_size)["index"]
+            # Encoding once pulls the model weights into memory before the first request arrives
+            self.index.encode(["khởi động"])
+        self._record("warmup", warmup.seconds)
+        self._pool = ThreadPoolExecutor(max_workers = self.workers, thread_name_prefix = "generation")
+
+    def shutdown(self, wait: bool = True) -> None:
+        """ 
+        Stop accepting work and release the workers.
+        @param wait (bool): Wait for running and queued jobs to finish. 
+        """
+        if self._pool is not None:
+            self._pool.shutdown(wait = wait)
+            self._pool = None
+
+    def submit(self, payload: Dict) -> Job:
+        """ 
+        Validate and enqueue a generation job.
+        @param payload (Dict): Job request, see 'validate_params'.
+        @return (Job): The queued job. 
+        """
+        params = validate_params(payload)
+        if self._pool is None:
+            raise RuntimeError("Service not started.")
+        if not self._slots.acquire(blocking = False):
+            with self._lock:
+                self._counts["rejected"] += 1
+            raise QueueFullError(f"All {self.workers} workers and {self.max_queue} queue slots are busy.")
+        job = Job(params)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._counts["submitted"] += 1
+            forgotten = self._forget_finished()
+        for job_id in forgotten:
+            shutil.rmtree(self._job_dir(job_id), ignore_errors = True)
+        self._pool.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """ 
+        Look up a job by identifier.
+        @param job_id (str): Job identifier.
+        @return (Optional[Job]): The job, or None if unknown or forgotten. 
+        """
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _job_dir(self, job_id: str) -> Path:
+        """ 
+        Output directory of a job.
+        @param job_id (str): Job identifier.
+        @return (Path): Directory holding the job's deck and audio. 
+        """
+        return self.cfg.outputs_dir / "jobs" / job_id
+
+    def _expire_job_dirs(self) -> None:
+        """ 
+        Delete job directories older than 'job_ttl'. 
+        """
+        # Other service processes share the directory, so only age tells which outputs nobody can fetch any more
+        cutoff = time() - self.job_ttl
+        jobs_dir = self.cfg.outputs_dir / "jobs"
+        if not jobs_dir.is_dir():
+            return
+        for job_dir in jobs_dir.iterdir():
+            try:
+                expired = job_dir.is_dir() and job_dir.stat().st_mtime < cutoff
+            except OSError:
+                continue
+            if expired:
+                shutil.rmtree(job_dir, ignore_errors = True)
+
+    def _forget_finished(self) -> List[str]:
+        """ 
+        Drop the oldest finished jobs beyond 'max_jobs'; the caller holds the lock.
+        @return (List[str]): Forgotten job identifiers, whose output directories the caller deletes. 
+        """
+        excess = len(self._jobs) - self.max_jobs
+        forgotten = [j.id for j in self._jobs.values() if j.status in ("done", "failed")][:max(0, excess)]
+        for job_id in forgotten:
+            del self._jobs[job_id]
+        return forgotten
+
+    def _record(self, name: str, seconds: float) -> None:
+        """ 
+        Keep a latency sample, bounded to the most recent 1000 per stage, and add it to the 'job_seconds' histogram.
+        @param name (str): Stage name.
+        @param seconds (float): Measured latency. 
+        """
+        with self._lock:
+            self._latencies.setdefault(name, deque(maxlen = 1000)).append(seconds)
+        REGISTRY.observe("job_seconds", seconds, phase = name)
+
+    def _run(self, job: Job) -> None:
+        """ 
+        Generate one deck (and its narration) in a worker thread.
+        @param job (Job): Job to execute. 
+        """
+        cfg = self.cfg
+        job.started_at = time()
+        job.status = "running"
+        self._record("queue_wait", job.started_at - job.created_at)
+        out_dir = self._job_dir(job.id)
+        stages = [
+            Stage("generation", generation_stage, inputs = ["index", "topic", "intent", "audience", "n_slides"], outputs = ["slides"], cacheable = False),
+            Stage("pptx", pptx_stage, inputs = ["slides", "pptx_location", "presentation_title"], outputs = ["pptx_path"], cacheable = False)
+        ]
+        if job.params["audio"]:
+            stages.append(Stage("tts", tts_stage, inputs = ["slides", "audio_location", "language", "tts_backend", "tts_workers", "tts_cache_location"], outputs = ["audio_paths"], cacheable = False))
+        graph = StageGraph(stages)
+        try:
+            values = graph.run({
+                "index": self.index,
+                "topic": job.params["topic"],
+                "intent": job.params["intent"],
+                "audience": job.params["audience"],
+                "n_slides": job.params["n_slides"],
+                "pptx_location": str(out_dir / "presentation.pptx"),
+                "presentation_title": job.params["title"] or cfg.presentation_title,
+                "audio_location": str(out_dir / "audio"),
+                "language": cfg.language,
+                "tts_backend": cfg.tts_backend,
+                "tts_workers": cfg.tts_workers,
+                # One cache for all jobs, so repeated slide notes are synthesized once per service rather than once per job
+                "tts_cache_location": str(cfg.tts_cache_dir)
+            }, workers = cfg.pipeline_workers)
+            job.pptx_path = values["pptx_path"]
+            job.audio_paths = values.get("audio_paths", [])
+            if self.on_output is not None:
+                self.on_output([job.pptx_path, *job.audio_paths])
+            job.status = "done"
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.status = "failed"
+        finally:
+            job.finished_at = time()
+            for name, t in graph.timings.items():
+                self._record(name, t["seconds"])
+            self._record("total", job.finished_at - job.created_at)
+            with self._lock:
+                self._counts[job.status] += 1
+            self._slots.release()
+
+    def prometheus_text(self) -> str:
+        """ 
+        Queue gauges and every REGISTRY histogram in the Prometheus text format.
+        @return (str): Exposition text. 
+        """
+        snapshot = self.metrics()
+        REGISTRY.set_gauge("job_queue_depth", snapshot["queue_depth"])
+        REGISTRY.set_gauge("jobs_running", snapshot["running"])
+        for state, count in snapshot["jobs"].items():
+            REGISTRY.set_gauge("jobs_total", count, state = state)
+        return REGISTRY.prometheus_text()
+
+    def metrics(self) -> Dict:
+        """ 
+        Snapshot of queue state, job counters, stage latencies and retrieval cache statistics.
+        @return (Dict): Metrics for the '/metrics' endpoint. 
+        """
+        with self._lock:
+            states = [j.status for j in self._jobs.values()]
+            latencies = {name: list(samples) for name, samples in self._latencies.items()}
+            counts = dict(self._counts)
+        stages: Dict[str, Dict] = {}
+        for name, samples in latencies.items():
+            ordered = sorted(samples)
+            stages[name] = {
+                "count": len(ordered),
+                "mean_seconds": round(sum(ordered) / len(ordered), 4),
+                "p50_seconds": round(ordered[min(len(ordered) - 1, int(0.5 * len(ordered)))], 4),
+                "p95_seconds": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], 4),
+                "max_seconds": round(ordered[-1], 4)
+            }
+        return {
+            "queue_depth": states.count("queued"),
+            "running": states.count("running"),
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "jobs": counts,
+            "stages": stages,
+            "retrieval_cache": RETRIEVAL_CACHE.stats()
+        }
\ No newline at end of file
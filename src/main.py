@@ -1,53 +1,128 @@
 # Import necessary libraries
-from bi_logging import append_metric
+from bi_logging import REGISTRY, append_metric, flush_metrics, span
 from config import AppConfig
-from data_pipeline import build_dataset
-from embedding_index import EmbeddingIndex
-from pptx_builder import build_presentation
-from rag_generator import generate_slides_with_notes
-from time import perf_counter
-from tts_service import synthesize_slide_audio
+from pathlib import Path
+from pipeline_dag import Stage, StageGraph
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from embedding_index import EmbeddingIndex
+
+# Stages import their heavy dependencies (FAISS, the sentence transformer, python-pptx) when they run,
+# so importing this module for its stage definitions stays cheap
+
+def dataset_stage(data_dir: Path, min_samples: int, preprocess_workers: int, download_limit: int, download_concurrency: int, dedup_threshold: Optional[float] = 0.8) -> Dict:
+    """ 
+    Pipeline stage: build or download the dataset.
+    @return (Dict): 'dataset_path'. 
+    """
+    from data_pipeline import build_dataset
+    dataset_path = build_dataset(data_dir = data_dir, min_samples = min_samples, workers = preprocess_workers, limit = max(min_samples, download_limit), concurrency = download_concurrency, dedup_threshold = dedup_threshold)
+    return {"dataset_path": dataset_path}
+
+def index_stage(dataset_path: Path, index_dir: Path, index_params: Dict, embed_batch_size: int) -> Dict:
+    """ 
+    Pipeline stage: load the cached embedding index or (incrementally) build it.
+    @return (Dict): 'index'. 
+    """
+    from embedding_index import EmbeddingIndex
+    index = EmbeddingIndex(**index_params)
+    index.build_or_load(dataset_path = dataset_path, cache_dir = index_dir, batch_size = embed_batch_size)
+    return {"index": index}
+
+def generation_stage(index: "EmbeddingIndex", topic: str, intent: str, audience: str, n_slides: int) -> Dict:
+    """ 
+    Pipeline stage: generate slides and speaker notes grounded by RAG.
+    @return (Dict): 'slides'. 
+    """
+    from rag_generator import generate_slides_with_notes
+    return {"slides": generate_slides_with_notes(index = index, topic = topic, intent = intent, audience = audience, n_slides = n_slides)}
+
+def pptx_stage(slides: List[Dict], pptx_location: str, presentation_title: str) -> Dict:
+    """ 
+    Pipeline stage: write the PowerPoint deck.
+    @return (Dict): 'pptx_path'. 
+    """
+    from pptx_builder import build_presentation
+    return {"pptx_path": build_presentation(slides = slides, out_path = Path(pptx_location), title = presentation_title)}
+
+def tts_stage(slides: List[Dict], audio_location: str, language: str, tts_backend: str, tts_workers: int, tts_cache_location: Optional[str] = None) -> Dict:
+    """ 
+    Pipeline stage: narrate every slide.
+    @return (Dict): 'audio_paths'. 
+    """
+    from tts_service import synthesize_slide_audio
+    return {"audio_paths": synthesize_slide_audio(slides = slides, out_dir = Path(audio_location), language = language, backend = tts_backend, workers = tts_workers, cache_dir = Path(tts_cache_location) if tts_cache_location else None)}
+
+def build_stages(dataset_max_age: Optional[float] = None) -> List[Stage]:
+    """ 
+    Declare the pipeline as a stage graph; PPTX and TTS only depend on 'slides' and run concurrently.
+    @param dataset_max_age (Optional[float]): Seconds the built dataset is reused before it is downloaded again, None to keep it until its settings or file change.
+    @return (List[Stage]): Pipeline stages. 
+    """
+    return [
+        # Skipped while its settings and dataset file are unchanged; the upstream rows (or a synthetic fallback written
+        # while offline) cannot be fingerprinted, so the result also expires to pick up new rows
+        Stage("dataset", dataset_stage, inputs = ["data_dir", "min_samples", "preprocess_workers", "download_limit", "download_concurrency", "dedup_threshold"], outputs = ["dataset_path"], max_age = dataset_max_age),
+        # The index keeps its own content-hash cache on disk and is a live object, so it is never skipped here
+        Stage("index", index_stage, inputs = ["dataset_path", "index_dir", "index_params", "embed_batch_size"], outputs = ["index"], cacheable = False),
+        Stage("generation", generation_stage, inputs = ["index", "topic", "intent", "audience", "n_slides"], outputs = ["slides"]),
+        Stage("pptx", pptx_stage, inputs = ["slides", "pptx_location", "presentation_title"], outputs = ["pptx_path"]),
+        Stage("tts", tts_stage, inputs = ["slides", "audio_location", "language", "tts_backend", "tts_workers", "tts_cache_location"], outputs = ["audio_paths"])
+    ]
 
 def run_pipeline() -> None:
     """ 
     Execute the end-to-end pipeline to produce a presentation and narration. 
     """
+    from rag_generator import presentation_stats
     cfg = AppConfig()
     cfg.ensure_dirs()
-    t_0 = perf_counter()
-    dataset_path = build_dataset(data_dir = cfg.data_dir, min_samples = cfg.min_samples)
-    t_1 = perf_counter()
-    index = EmbeddingIndex()
-    index.build(dataset_path = dataset_path)
-    t_2 = perf_counter()
     topic = "Khai phá dữ liệu"
     intent = "giảng dạy"
     audience = "sinh viên"
-    slides = generate_slides_with_notes(index = index, topic = topic, intent = intent, audience = audience, n_slides = 10)
-    t_3 = perf_counter()
-    pptx_path = cfg.outputs_dir / "presentation_auto_generated.pptx"
-    build_presentation(slides = slides, out_path = pptx_path, title = cfg.presentation_title)
-    t_4 = perf_counter()
-    audio_dir = cfg.outputs_dir / "audio"
-    synthesize_slide_audio(slides = slides, out_dir = audio_dir, language = cfg.language)
-    t_5 = perf_counter()
+    graph = StageGraph(build_stages(dataset_max_age = cfg.dataset_max_age), state_path = cfg.state_path)
+    with span("pipeline_seconds") as total:
+        values = graph.run({
+            "data_dir": cfg.data_dir,
+            "min_samples": cfg.min_samples,
+            "preprocess_workers": cfg.preprocess_workers,
+            "download_limit": cfg.download_limit,
+            "download_concurrency": cfg.download_concurrency,
+            "dedup_threshold": cfg.dedup_threshold,
+            "index_dir": cfg.index_dir,
+            "index_params": cfg.index_params(),
+            "embed_batch_size": cfg.embed_batch_size,
+            "topic": topic,
+            "intent": intent,
+            "audience": audience,
+            "n_slides": 10,
+            # Output locations are plain strings: they name where to write, they are not content to fingerprint
+            "pptx_location": str(cfg.outputs_dir / "presentation_auto_generated.pptx"),
+            "presentation_title": cfg.presentation_title,
+            "audio_location": str(cfg.outputs_dir / "audio"),
+            "language": cfg.language,
+            "tts_backend": cfg.tts_backend,
+            "tts_workers": cfg.tts_workers,
+            "tts_cache_location": str(cfg.tts_cache_dir)
+        }, workers = cfg.pipeline_workers)
+    slides = values["slides"]
     append_metric(cfg.logs_dir, "pipeline_times.csv", {
-        "dataset_seconds": round(t_1 - t_0, 3),
-        "index_seconds": round(t_2 - t_1, 3),
-        "generation_seconds": round(t_3 - t_2, 3),
-        "pptx_seconds": round(t_4 - t_3, 3),
-        "tts_seconds": round(t_5 - t_4, 3),
-        "total_seconds": round(t_5 - t_0, 3)
-    })
-    append_metric(cfg.logs_dir, "presentation_stats.csv", {
-        "topic": topic,
-        "intent": intent,
-        "audience": audience,
-        "slides_count": len(slides),
-        "avg_notes_len_words": round(sum(len(s['notes'].split()) for s in slides) / len(slides), 2)
+        "dataset_seconds": round(graph.timings["dataset"]["seconds"], 3),
+        "index_seconds": round(graph.timings["index"]["seconds"], 3),
+        "generation_seconds": round(graph.timings["generation"]["seconds"], 3),
+        "pptx_seconds": round(graph.timings["pptx"]["seconds"], 3),
+        "tts_seconds": round(graph.timings["tts"]["seconds"], 3),
+        "total_seconds": round(total.seconds, 3)
     })
-    print(f"Presentation saved to: {pptx_path}")
-    print(f"Audio saved to: {audio_dir}")
+    append_metric(cfg.logs_dir, "presentation_stats.csv", presentation_stats(topic, intent, audience, slides))
+    flush_metrics()
+    REGISTRY.export(cfg.logs_dir / "latency_summary.csv")
+    skipped = [name for name, t in graph.timings.items() if t["skipped"]]
+    if skipped:
+        print(f"Unchanged stages skipped: {', '.join(skipped)}")
+    print(f"Presentation saved to: {values['pptx_path']}")
+    print(f"Audio saved to: {values['audio_location']}")
 
 def main() -> None:
     """ 
@@ -0,0 +1,62 @@
+# Import necessary libraries
+from threading import Lock
+from typing import TYPE_CHECKING, Any, Dict, List
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+# Models by name; anything with a SentenceTransformer-compatible 'encode' can be registered
+_MODELS: Dict[str, Any] = {}
+_LOCK = Lock()
+
+def get_model(model_name: str) -> "SentenceTransformer":
+    """ 
+    Return a warm SentenceTransformer, loading it on first use only.
+    @param model_name (str): Name or path of the sentence transformer model.
+    @return (SentenceTransformer): Process-wide shared model instance. 
+    """
+    model = _MODELS.get(model_name)
+    if model is not None:
+        return model
+    with _LOCK:
+        # Re-check under the lock so concurrent callers load the weights once
+        model = _MODELS.get(model_name)
+        if model is None:
+            # Imported on first load only: torch alone takes seconds to import
+            from sentence_transformers import SentenceTransformer
+            model = SentenceTransformer(model_name)
+            _MODELS[model_name] = model
+    return model
+
+def register_model(model_name: str, model: Any) -> None:
+    """ 
+    Serve a preloaded or stand-in model under a name, for example a stub encoder in offline benchmarks.
+    @param model_name (str): Name callers pass to 'get_model'.
+    @param model (Any): Object with a SentenceTransformer-compatible 'encode' method. 
+    """
+    with _LOCK:
+        _MODELS[model_name] = model
+
+def unload_model(model_name: str) -> bool:
+    """ 
+    Evict a model from the registry so its memory can be reclaimed.
+    @param model_name (str): Name of the model to evict.
+    @return (bool): True if the model was loaded and has been evicted. 
+    """
+    with _LOCK:
+        return _MODELS.pop(model_name, None) is not None
+
+def clear_models() -> None:
+    """ 
+    Evict every loaded model. 
+    """
+    with _LOCK:
+        _MODELS.clear()
+
+def loaded_models() -> List[str]:
+    """ 
+    List the names of models currently kept warm.
+    @return (List[str]): Loaded model names. 
+    """
+    with _LOCK:
+        return list(_MODELS.keys())
\ No newline at end of file
@@ -0,0 +1,193 @@
+# Import necessary libraries
+import base64
+from bisect import bisect_left, bisect_right, insort
+import os
+from pathlib import Path
+from threading import Lock
+from time import monotonic, time_ns
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+class OutputManifest:
+    """ 
+    In-memory, sorted index of generated files kept current from directory mtimes.
+    A directory is only re-listed when its mtime changed; otherwise its known files are re-stat'ed, which still catches
+    files rewritten in place (they do not touch their directory) without the cost of listing.
+    Hidden names (the audio cache, temp files) are not listed.
+
+    Attributes:
+    - root (Path): Output directory to index.
+    - min_interval (float): Minimum seconds between two directory scans. 
+    """
+
+    def __init__(self, root: Path, min_interval: float = 1.0) -> None:
+        self.root = root
+        self.min_interval = min_interval
+        self._files: Dict[str, Tuple[int, int]] = {}
+        self._paths: List[str] = []
+        self._dir_files: Dict[str, Set[str]] = {}
+        self._dirs: Dict[str, Tuple[int, List[str]]] = {}
+        # The epoch makes ETags from a previous process never match the current one
+        self._epoch = format(time_ns(), "x")
+        self._generation = 0
+        self._last_refresh: Optional[float] = None
+        self._lock = Lock()
+
+    @property
+    def version(self) -> str:
+        """ 
+        Identifier that changes whenever any entry changes.
+        @return (str): Version string. 
+        """
+        return f"{self._epoch}-{self._generation}"
+
+    def _set(self, path: str, meta: Tuple[int, int]) -> None:
+        """ 
+        Add or update one file entry; the caller holds the lock.
+        @param path (str): Listed path.
+        @param meta (Tuple[int, int]): Size in bytes and mtime in nanoseconds. 
+        """
+        previous = self._files.get(path)
+        if previous == meta:
+            return
+        if previous is None:
+            insort(self._paths, path)
+            self._dir_files.setdefault(os.path.dirname(path), set()).add(path)
+        self._files[path] = meta
+        self._generation += 1
+
+    def _drop(self, path: str) -> None:
+        """ 
+        Remove one file entry; the caller holds the lock.
+        @param path (str): Listed path. 
+        """
+        if self._files.pop(path, None) is None:
+            return
+        del self._paths[bisect_left(self._paths, path)]
+        self._dir_files.get(os.path.dirname(path), set()).discard(path)
+        self._generation += 1
+
+    def _scan_dir(self, directory: str, seen: Set[str]) -> None:
+        """ 
+        Re-list a directory if its mtime changed, then recurse into its subdirectories.
+        @param directory (str): Directory path.
+        @param seen (Set[str]): Directories reached in this scan. 
+        """
+        seen.add(directory)
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except FileNotFoundError:
+            return
+        cached = self._dirs.get(directory)
+        if cached is not None and cached[0] == mtime:
+            subdirs = cached[1]
+            for path in list(self._dir_files.get(directory, ())):
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    self._drop(path)
+                    continue
+                self._set(path, (st.st_size, st.st_mtime_ns))
+        else:
+            files: Dict[str, Tuple[int, int]] = {}
+            subdirs = []
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.name.startswith("."):
+                        continue
+                    if entry.is_dir(follow_symlinks = False):
+                        subdirs.append(entry.path)
+                    elif entry.is_file():
+                        st = entry.stat()
+                        files[entry.path] = (st.st_size, st.st_mtime_ns)
+            for path in self._dir_files.get(directory, set()) - set(files):
+                self._drop(path)
+            for path, meta in files.items():
+                self._set(path, meta)
+            self._dirs[directory] = (mtime, subdirs)
+        for subdir in subdirs:
+            self._scan_dir(subdir, seen)
+
+    def refresh(self, force: bool = False) -> None:
+        """ 
+        Bring the manifest up to date with the output directory, at most once per 'min_interval'.
+        @param force (bool): Scan even if the last scan is recent. 
+        """
+        with self._lock:
+            now = monotonic()
+            if not force and self._last_refresh is not None and now - self._last_refresh < self.min_interval:
+                return
+            self._last_refresh = now
+            seen: Set[str] = set()
+            self._scan_dir(str(self.root), seen)
+            for directory in [d for d in self._dirs if d not in seen]:
+                for path in list(self._dir_files.get(directory, set())):
+                    self._drop(path)
+                del self._dirs[directory]
+
+    def register(self, paths: Iterable[Path]) -> None:
+        """ 
+        Record files just written by a pipeline so they are listed without waiting for a scan.
+        @param paths (Iterable[Path]): Written files inside 'root'. 
+        """
+        root = self.root.resolve()
+        with self._lock:
+            for p in paths:
+                try:
+                    rel = p.resolve().relative_to(root)
+                except ValueError:
+                    continue
+                if any(part.startswith(".") for part in rel.parts):
+                    continue
+                path = str(self.root / rel)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    self._drop(path)
+                    continue
+                self._set(path, (st.st_size, st.st_mtime_ns))
+
+    def page(self, cursor: Optional[str] = None, limit: int = 500, prefix: str = "", types: Optional[Set[str]] = None) -> Tuple[List[Dict], Optional[str]]:
+        """ 
+        Return one page of entries in path order.
+        @param cursor (Optional[str]): Last path of the previous page, None for the first page.
+        @param limit (int): Maximum entries per page.
+        @param prefix (str): Only list paths starting with this prefix.
+        @param types (Optional[Set[str]]): Only list these lowercase extensions (in example, {'pptx', 'mp3'}).
+        @return (Tuple[List[Dict], Optional[str]]): Entries with 'path', 'type', 'size', 'mtime' and the cursor of the next page. 
+        """
+        items: List[Dict] = []
+        with self._lock:
+            i = bisect_right(self._paths, cursor) if cursor else 0
+            if prefix:
+                i = max(i, bisect_left(self._paths, prefix))
+            while i < len(self._paths) and len(items) < limit:
+                path = self._paths[i]
+                i += 1
+                if prefix and not path.startswith(prefix):
+                    break
+                ext = os.path.splitext(path)[1][1:].lower()
+                if types and ext not in types:
+                    continue
+                size, mtime_ns = self._files[path]
+                items.append({"path": path, "type": ext, "size": size, "mtime": mtime_ns / 1e9})
+            more = i < len(self._paths) and (not prefix or self._paths[i].startswith(prefix))
+        return items, (items[-1]["path"] if items and len(items) == limit and more else None)
+
+def encode_cursor(path: str) -> str:
+    """ 
+    Make a page cursor opaque and URL-safe.
+    @param path (str): Last listed path.
+    @return (str): Cursor token. 
+    """
+    return base64.urlsafe_b64encode(path.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(token: str) -> str:
+    """ 
+    Inverse of 'encode_cursor'.
+    @param token (str): Cursor token.
+    @return (str): Last listed path. 
+    """
+    try:
+        return base64.b64decode(token + "=" * (-len(token) % 4), altchars = b"-_", validate = True).decode("utf-8")
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor.") from e
\ No newline at end of file
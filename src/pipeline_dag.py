@@ -0,0 +1,216 @@
+# Import necessary libraries
+from bi_logging import span
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+import hashlib
+import json
+from pathlib import Path
+from threading import Lock
+from time import time
+from typing import Any, Callable, Dict, List, Optional
+
+class Stage:
+    """ 
+    A pipeline step with declared inputs and outputs.
+
+    Attributes:
+    - name (str): Unique stage name, used for timings and the skip cache.
+    - func (Callable[..., Dict[str, Any]]): Called with the inputs as keyword arguments; returns the outputs by name.
+    - inputs (List[str]): Names of values the stage consumes.
+    - outputs (List[str]): Names of values the stage produces.
+    - cacheable (bool): Skip the stage when its input fingerprints match the last successful run and its output files are unchanged.
+      Outputs of cacheable stages must be JSON-serializable (Paths are allowed).
+    - version (str): Bump to invalidate cached results after changing the stage's logic.
+    - max_age (Optional[float]): Seconds a cached result is reused, for stages that read sources their inputs cannot fingerprint; None never expires. 
+    """
+
+    def __init__(self, name: str, func: Callable[..., Dict[str, Any]], inputs: List[str], outputs: List[str], cacheable: bool = True, version: str = "1", max_age: Optional[float] = None) -> None:
+        self.name = name
+        self.func = func
+        self.inputs = inputs
+        self.outputs = outputs
+        self.cacheable = cacheable
+        self.version = version
+        self.max_age = max_age
+
+def _canonical(value: Any) -> Any:
+    """ 
+    Reduce a value to a JSON-friendly form that changes whenever the value does.
+    @param value (Any): Stage input.
+    @return (Any): Canonical representation for fingerprinting. 
+    """
+    if isinstance(value, Path):
+        # A directory is a location, not content; files use size and mtime to avoid re-hashing large artifacts
+        if value.is_dir():
+            return [str(value), "dir"]
+        if value.exists():
+            st = value.stat()
+            return [str(value), st.st_size, st.st_mtime_ns]
+        return [str(value), None]
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    if isinstance(getattr(value, "version", None), str):
+        return [type(value).__name__, value.version]
+    return value
+
+def fingerprint(value: Any) -> str:
+    """ 
+    Stable digest of a stage input.
+    @param value (Any): Stage input; objects are fingerprinted through a 'version' string attribute.
+    @return (str): Hex digest. 
+    """
+    payload = json.dumps(_canonical(value), sort_keys = True, ensure_ascii = False, default = str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _encode(value: Any) -> Any:
+    """ 
+    Make stage outputs JSON-serializable, tagging Paths so they can be restored.
+    @param value (Any): Output value.
+    @return (Any): JSON-compatible value. 
+    """
+    if isinstance(value, Path):
+        return {"__path__": str(value)}
+    if isinstance(value, (list, tuple)):
+        return [_encode(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _encode(v) for k, v in value.items()}
+    return value
+
+def _decode(value: Any) -> Any:
+    """ 
+    Inverse of '_encode'.
+    @param value (Any): Stored JSON value.
+    @return (Any): Restored output value. 
+    """
+    if isinstance(value, dict):
+        if set(value) == {"__path__"}:
+            return Path(value["__path__"])
+        return {k: _decode(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+    return value
+
+def _paths_exist(value: Any) -> bool:
+    """ 
+    Check that every artifact referenced by restored outputs is still on disk.
+    @param value (Any): Decoded outputs.
+    @return (bool): True if all referenced paths exist. 
+    """
+    if isinstance(value, Path):
+        return value.exists()
+    if isinstance(value, (list, tuple)):
+        return all(_paths_exist(v) for v in value)
+    if isinstance(value, dict):
+        return all(_paths_exist(v) for v in value.values())
+    return True
+
+class StageGraph:
+    """ 
+    Executes stages as a dependency graph, running independent stages concurrently.
+
+    Attributes:
+    - stages (List[Stage]): Stages of the pipeline.
+    - state_path (Optional[Path]): JSON file remembering fingerprints and outputs of successful runs.
+    - timings (Dict[str, Dict]): Per-stage 'seconds' and 'skipped' flag of the last run. 
+    """
+
+    def __init__(self, stages: List[Stage], state_path: Optional[Path] = None) -> None:
+        self.stages = stages
+        self.state_path = state_path
+        self.timings: Dict[str, Dict] = {}
+        self._lock = Lock()
+        names = [s.name for s in stages]
+        if len(set(names)) != len(names):
+            raise ValueError("Stage names must be unique.")
+        produced = [o for s in stages for o in s.outputs]
+        if len(set(produced)) != len(produced):
+            raise ValueError("Each value must be produced by exactly one stage.")
+
+    def _load_state(self) -> Dict[str, Dict]:
+        """ 
+        Read the state of previous runs.
+        @return (Dict[str, Dict]): Stage name to fingerprint and outputs. 
+        """
+        if self.state_path is None or not self.state_path.exists():
+            return {}
+        try:
+            with self.state_path.open("r", encoding = "utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self, state: Dict[str, Dict]) -> None:
+        """ 
+        Persist the state atomically.
+        @param state (Dict[str, Dict]): Stage name to fingerprint and outputs. 
+        """
+        if self.state_path is None:
+            return
+        self.state_path.parent.mkdir(parents = True, exist_ok = True)
+        tmp_path = self.state_path.with_suffix(".tmp")
+        with tmp_path.open("w", encoding = "utf-8") as f:
+            json.dump(state, f, ensure_ascii = False, indent = 2)
+        tmp_path.replace(self.state_path)
+
+    def _run_stage(self, stage: Stage, values: Dict[str, Any], state: Dict[str, Dict]) -> Dict[str, Any]:
+        """ 
+        Run one stage, or restore its outputs when its inputs are unchanged.
+        @param stage (Stage): Stage to execute.
+        @param values (Dict[str, Any]): Available values; must contain the stage inputs.
+        @param state (Dict[str, Dict]): Shared run state, updated on success.
+        @return (Dict[str, Any]): Stage outputs. 
+        """
+        kwargs = {name: values[name] for name in stage.inputs}
+        key = fingerprint([stage.name, stage.version, {name: fingerprint(v) for name, v in kwargs.items()}])
+        previous = state.get(stage.name, {})
+        fresh = stage.max_age is None or time() - previous.get("created_at", 0.0) <= stage.max_age
+        if stage.cacheable and previous.get("fingerprint") == key and fresh:
+            with span("stage_seconds", stage = stage.name, skipped = "true") as timer:
+                outputs = _decode(previous.get("outputs", {}))
+                # Output files replaced or edited since the last run make it stale, like changed inputs do
+                restored = set(outputs) == set(stage.outputs) and _paths_exist(outputs) and fingerprint(outputs) == previous.get("outputs_fingerprint")
+            if restored:
+                self.timings[stage.name] = {"seconds": timer.seconds, "skipped": True}
+                return outputs
+        with span("stage_seconds", stage = stage.name, skipped = "false") as timer:
+            outputs = stage.func(**kwargs)
+        missing = set(stage.outputs) - set(outputs)
+        if missing:
+            raise RuntimeError(f"Stage '{stage.name}' did not produce {sorted(missing)}.")
+        if stage.cacheable:
+            with self._lock:
+                kept = {name: outputs[name] for name in stage.outputs}
+                state[stage.name] = {"fingerprint": key, "outputs": _encode(kept), "outputs_fingerprint": fingerprint(kept), "created_at": time()}
+                self._save_state(state)
+        self.timings[stage.name] = {"seconds": timer.seconds, "skipped": False}
+        return outputs
+
+    def run(self, initial: Dict[str, Any], workers: int = 4) -> Dict[str, Any]:
+        """ 
+        Execute every stage once its inputs are available.
+        @param initial (Dict[str, Any]): Externally provided values (configuration, parameters).
+        @param workers (int): Maximum stages running at the same time.
+        @return (Dict[str, Any]): All initial and produced values. 
+        """
+        values = dict(initial)
+        state = self._load_state()
+        self.timings = {}
+        remaining = list(self.stages)
+        running: Dict[Future, Stage] = {}
+        with ThreadPoolExecutor(max_workers = max(1, workers)) as pool:
+            while remaining or running:
+                ready = [s for s in remaining if all(name in values for name in s.inputs)]
+                for stage in ready:
+                    remaining.remove(stage)
+                    running[pool.submit(self._run_stage, stage, values, state)] = stage
+                if not running:
+                    blocked = {s.name: [n for n in s.inputs if n not in values] for s in remaining}
+                    raise RuntimeError(f"Unsatisfiable stage inputs (missing value or cycle): {blocked}")
+                done, _ = wait(running, return_when = FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    # Re-raises the stage's exception; the executor waits for stages already running
+                    outputs = future.result()
+                    values.update({name: outputs[name] for name in stage.outputs})
+        return values
\ No newline at end of file
@@ -1,27 +1,102 @@
 # Import necessary libraries
-from embedding_index import EmbeddingIndex
 from prompt_templates import build_slide_plan, build_speaker_notes
-from typing import Dict, List
+from retrieval_cache import RetrievalCache
+from typing import TYPE_CHECKING, Dict, List, Optional
 
-def generate_slides_with_notes(index: EmbeddingIndex, topic: str, intent: str, audience: str, n_slides: int = 8) -> List[Dict]:
+if TYPE_CHECKING:
+    # Annotation only: importing the index pulls in FAISS
+    from embedding_index import EmbeddingIndex
+
+# Process-wide cache; slide titles from 'build_slide_plan' repeat across decks and requests
+RETRIEVAL_CACHE = RetrievalCache()
+
+def _build_outline(topic: str, intent: str, audience: str, n_slides: int) -> List[Dict]:
     """ 
-    Generate slides and speaker notes grounded by RAG.
-    @param index (EmbeddingIndex): Built embedding index for retrieval.
+    Expand the slide plan to the requested number of slides.
     @param topic (str): Topic for the presentation.
     @param intent (str): Intent (in example, 'giảng dạy').
     @param audience (str): Target audience.
     @param n_slides (int): Number of slides to generate.
-    @return (List[Dict]): List of slides with 'title', 'bullets', 'notes'. 
+    @return (List[Dict]): List of slide dicts with 'title' and 'bullets'. 
     """
-    query = f"{topic} {intent} {audience}"
-    results = index.search(query = query, top_k = 10)
-    rag_chunks = [r["chunk"] for r in results]
     outline = build_slide_plan(topic = topic, intent = intent, audience = audience)
     # Extend outline to 'n_slides' by repeating thematic pattern
     while len(outline) < n_slides:
         outline.append({"title": f"Ví dụ thực tế về {topic}", "bullets": ["Bài học", "Kết quả", "Tác động", "Khuyến nghị"]})
-    slides: List[Dict] = []
-    for item in outline[:n_slides]:
-        notes = build_speaker_notes(slide_title = item["title"], bullets = item["bullets"], rag_chunks = rag_chunks, audience = audience)
-        slides.append({"title": item["title"], "bullets": item["bullets"], "notes": notes})
-    return slides
\ No newline at end of file
+    return outline[:n_slides]
+
+def slide_query(topic: str, item: Dict) -> str:
+    """ 
+    Build the retrieval query of one slide from its title and bullets.
+    @param topic (str): Topic for the presentation, prepended when the title does not mention it.
+    @param item (Dict): Slide with 'title' and 'bullets'.
+    @return (str): Query text. 
+    """
+    title = item["title"] if topic in item["title"] else f"{topic}: {item['title']}"
+    return f"{title}. {', '.join(item['bullets'])}"
+
+def generate_many_slides(index: "EmbeddingIndex", jobs: List[Dict], top_k: int = 4, cache: Optional[RetrievalCache] = None) -> List[List[Dict]]:
+    """ 
+    Generate many decks with per-slide grounding, retrieving for every slide of every deck in one cached, batched search.
+    @param index (EmbeddingIndex): Built embedding index for retrieval.
+    @param jobs (List[Dict]): Decks with 'topic', 'intent', 'audience' and optional 'n_slides' (default 8).
+    @param top_k (int): Number of chunks retrieved per slide.
+    @param cache (Optional[RetrievalCache]): Query-result cache, the process-wide RETRIEVAL_CACHE by default.
+    @return (List[List[Dict]]): Slides per job, in job order. 
+    """
+    cache = cache if cache is not None else RETRIEVAL_CACHE
+    outlines = [_build_outline(job["topic"], job["intent"], job["audience"], int(job.get("n_slides", 8))) for job in jobs]
+    queries: List[str] = []
+    filters: List[Dict] = []
+    for job, outline in zip(jobs, outlines):
+        for item in outline:
+            queries.append(slide_query(job["topic"], item))
+            filters.append({"audience": job["audience"]})
+    if not queries:
+        return [[] for _ in jobs]
+    results = cache.search_many(index, queries, top_k = top_k, filters = filters)
+    empty = [row for row, r in enumerate(results) if not r]
+    if empty:
+        # No chunk was written for these audiences, so fall back to the whole corpus
+        for row, r in zip(empty, cache.search_many(index, [queries[row] for row in empty], top_k = top_k)):
+            results[row] = r
+    decks: List[List[Dict]] = []
+    row = 0
+    for job, outline in zip(jobs, outlines):
+        slides: List[Dict] = []
+        for item in outline:
+            rag_chunks = [x["chunk"] for x in results[row]]
+            row += 1
+            notes = build_speaker_notes(slide_title = item["title"], bullets = item["bullets"], rag_chunks = rag_chunks, audience = job["audience"])
+            slides.append({"title": item["title"], "bullets": item["bullets"], "notes": notes})
+        decks.append(slides)
+    return decks
+
+def generate_slides_with_notes(index: "EmbeddingIndex", topic: str, intent: str, audience: str, n_slides: int = 8) -> List[Dict]:
+    """ 
+    Generate slides and speaker notes grounded by RAG.
+    @param index (EmbeddingIndex): Built embedding index for retrieval.
+    @param topic (str): Topic for the presentation.
+    @param intent (str): Intent (in example, 'giảng dạy').
+    @param audience (str): Target audience.
+    @param n_slides (int): Number of slides to generate.
+    @return (List[Dict]): List of slides with 'title', 'bullets', 'notes'. 
+    """
+    return generate_many_slides(index, [{"topic": topic, "intent": intent, "audience": audience, "n_slides": n_slides}])[0]
+
+def presentation_stats(topic: str, intent: str, audience: str, slides: List[Dict]) -> Dict:
+    """ 
+    Summarize a generated deck as a 'presentation_stats.csv' row.
+    @param topic (str): Topic of the presentation.
+    @param intent (str): Intent of the presentation.
+    @param audience (str): Target audience.
+    @param slides (List[Dict]): Generated slides.
+    @return (Dict): Metric row. 
+    """
+    return {
+        "topic": topic,
+        "intent": intent,
+        "audience": audience,
+        "slides_count": len(slides),
+        "avg_notes_len_words": round(sum(len(s['notes'].split()) for s in slides) / len(slides), 2)
+    }
\ No newline at end of file
@@ -0,0 +1,129 @@
+# Import necessary libraries
+from collections import OrderedDict
+import json
+from threading import Lock
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
+from utils import normalize_vi_text
+
+if TYPE_CHECKING:
+    from embedding_index import EmbeddingIndex, Filters
+
+CacheKey = Tuple[str, int, str, str]
+
+class RetrievalCache:
+    """ 
+    Thread-safe LRU cache of search results keyed by normalized query, 'top_k', filters and index version.
+
+    Attributes:
+    - capacity (int): Maximum number of cached queries; the least recently used is evicted first.
+    - hits (int): Lookups answered from the cache.
+    - misses (int): Lookups that had to search the index. 
+    """
+
+    def __init__(self, capacity: int = 4096) -> None:
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[CacheKey, List[Dict]]" = OrderedDict()
+        self._lock = Lock()
+
+    @staticmethod
+    def make_key(query: str, top_k: int, filters: "Optional[Filters]", version: str) -> CacheKey:
+        """ 
+        Build the cache key of one lookup.
+        @param query (str): Normalized query text.
+        @param top_k (int): Number of results requested.
+        @param filters (Optional[Filters]): Metadata constraints of the search.
+        @param version (str): Index version; a rebuilt or updated index never serves stale results.
+        @return (CacheKey): Hashable key. 
+        """
+        return (query, top_k, json.dumps(filters or {}, sort_keys = True, ensure_ascii = False), version)
+
+    def get(self, key: CacheKey) -> Optional[List[Dict]]:
+        """ 
+        Look up cached results and mark them as recently used.
+        @param key (CacheKey): Key from 'make_key'.
+        @return (Optional[List[Dict]]): Cached results, or None on a miss. 
+        """
+        with self._lock:
+            value = self._lookup(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def _lookup(self, key: CacheKey) -> Optional[List[Dict]]:
+        """ 
+        Uncounted lookup; the caller holds the lock.
+        @param key (CacheKey): Key from 'make_key'.
+        @return (Optional[List[Dict]]): Cached results, or None on a miss. 
+        """
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: CacheKey, value: List[Dict]) -> None:
+        """ 
+        Store results, evicting the least recently used entries beyond capacity.
+        @param key (CacheKey): Key from 'make_key'.
+        @param value (List[Dict]): Search results. 
+        """
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last = False)
+
+    def clear(self) -> None:
+        """ 
+        Drop every entry and reset the counters. 
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict:
+        """ 
+        Snapshot of the cache counters.
+        @return (Dict): 'hits', 'misses', 'hit_rate' and current 'size'. 
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0, "size": len(self._entries)}
+
+    def search_many(self, index: "EmbeddingIndex", queries: List[str], top_k: int = 8, filters: "Union[None, Filters, List[Optional[Filters]]]" = None) -> List[List[Dict]]:
+        """ 
+        Search through the cache, encoding and searching only the missed queries in one batch.
+        @param index (EmbeddingIndex): Built embedding index.
+        @param queries (List[str]): Query texts.
+        @param top_k (int): Number of top results to fetch per query.
+        @param filters (Union[None, Filters, List[Optional[Filters]]]): Metadata constraints, shared or one per query.
+        @return (List[List[Dict]]): Retrieved chunks per query; shared with the cache, so treat them as read-only. 
+        """
+        per_query = filters if isinstance(filters, list) else [filters] * len(queries)
+        if len(per_query) != len(queries):
+            raise ValueError("Expected one filter per query.")
+        version = index.version
+        texts = [normalize_vi_text(q) for q in queries]
+        keys = [self.make_key(t, top_k, f, version) for t, f in zip(texts, per_query)]
+        with self._lock:
+            results: List[Optional[List[Dict]]] = [self._lookup(k) for k in keys]
+        # Repeated queries within one call are searched once, so only the first occurrence counts as a miss
+        missed: Dict[CacheKey, List[int]] = {}
+        for row, r in enumerate(results):
+            if r is None:
+                missed.setdefault(keys[row], []).append(row)
+        with self._lock:
+            self.misses += len(missed)
+            self.hits += len(keys) - len(missed)
+        if missed:
+            first_rows = [rows[0] for rows in missed.values()]
+            found = index.search_many([texts[row] for row in first_rows], top_k = top_k, filters = [per_query[row] for row in first_rows])
+            for (key, rows), r in zip(missed.items(), found):
+                self.put(key, r)
+                for row in rows:
+                    results[row] = r
+        return results
\ No newline at end of file
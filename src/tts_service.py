@@ -1,19 +1,177 @@
 # Import necessary libraries
-from gtts import gTTS
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import os
 from pathlib import Path
-from typing import Dict, List
+import shutil
+from threading import Lock
+from typing import Callable, Dict, List, Optional
 from utils import normalize_vi_text
 
-def synthesize_slide_audio(slides: List[Dict], out_dir: Path, language: str = "vi") -> None:
+class TTSBackend(ABC):
     """ 
-    Create MP3 audio files for each slide's speaker notes.
+    Base class for pluggable text-to-speech engines.
+
+    Attributes:
+    - name (str): Registry name, also part of the audio cache key.
+    - extension (str): File extension of the produced audio. 
+    """
+    name = "base"
+    extension = ".mp3"
+
+    @abstractmethod
+    def synthesize(self, text: str, language: str, slow: bool, out_path: Path) -> None:
+        """ 
+        Synthesize speech for a text into an audio file.
+        @param text (str): Normalized text to speak.
+        @param language (str): Language code for TTS.
+        @param slow (bool): Speak slowly if the engine supports it.
+        @param out_path (Path): Destination audio file. 
+        """
+
+class GTTSBackend(TTSBackend):
+    """ 
+    Google Translate TTS through gTTS (network). 
+    """
+    name = "gtts"
+    extension = ".mp3"
+
+    def synthesize(self, text: str, language: str, slow: bool, out_path: Path) -> None:
+        from gtts import gTTS
+        gTTS(text = text, lang = language, slow = slow).save(str(out_path))
+
+class Pyttsx3Backend(TTSBackend):
+    """ 
+    Offline synthesis through the local pyttsx3 engine (eSpeak, SAPI5 or NSSS).
+    pyttsx3 shares one engine per driver and its run loop is not re-entrant, so calls are serialized across threads;
+    'language' selects the first installed voice for that language (the default voice if none matches) and 'slow' lowers the rate. 
+    """
+    name = "pyttsx3"
+    extension = ".wav"
+    _lock = Lock()
+
+    @staticmethod
+    def _voice_for(engine, language: str) -> Optional[str]:
+        """ 
+        Find an installed voice speaking a language.
+        @param engine (pyttsx3.Engine): Initialized engine.
+        @param language (str): Language code (in example, 'vi').
+        @return (Optional[str]): Voice id, None if no voice matches. 
+        """
+        code = language.lower()
+        for voice in engine.getProperty("voices"):
+            # eSpeak reports languages as bytes prefixed with a priority byte, other drivers as strings
+            tags = [(t.decode("utf-8", "ignore") if isinstance(t, bytes) else str(t)).lower().lstrip("\x00\x01\x02\x03\x04\x05") for t in (voice.languages or [])]
+            if any(tag == code or tag.startswith(code + "-") or tag.startswith(code + "_") for tag in tags):
+                return voice.id
+        return None
+
+    def synthesize(self, text: str, language: str, slow: bool, out_path: Path) -> None:
+        import pyttsx3
+        with self._lock:
+            engine = pyttsx3.init()
+            voice = self._voice_for(engine, language)
+            if voice is not None:
+                engine.setProperty("voice", voice)
+            # The engine is shared, so the rate is set on every call rather than scaled from the previous one
+            engine.setProperty("rate", 150 if slow else 200)
+            engine.save_to_file(text, str(out_path))
+            engine.runAndWait()
+
+class NullBackend(TTSBackend):
+    """ 
+    Writes empty audio files instantly; for tests and benchmarks without network or audio engines. 
+    """
+    name = "null"
+    extension = ".mp3"
+
+    def synthesize(self, text: str, language: str, slow: bool, out_path: Path) -> None:
+        out_path.write_bytes(b"")
+
+_BACKENDS: Dict[str, Callable[[], TTSBackend]] = {
+    GTTSBackend.name: GTTSBackend,
+    Pyttsx3Backend.name: Pyttsx3Backend,
+    NullBackend.name: NullBackend
+}
+
+def register_backend(name: str, factory: Callable[[], TTSBackend]) -> None:
+    """ 
+    Register a TTS backend so it can be selected by name.
+    @param name (str): Backend name used in AppConfig.tts_backend.
+    @param factory (Callable[[], TTSBackend]): Zero-argument constructor of the backend. 
+    """
+    _BACKENDS[name] = factory
+
+def get_backend(name: str) -> TTSBackend:
+    """ 
+    Instantiate a registered TTS backend.
+    @param name (str): Backend name.
+    @return (TTSBackend): Backend instance. 
+    """
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown TTS backend '{name}', expected one of {sorted(_BACKENDS)}.")
+    return _BACKENDS[name]()
+
+def audio_cache_key(text: str, language: str, slow: bool, backend: str) -> str:
+    """ 
+    Content address of a narration, so unchanged notes map to the same cached audio.
+    @param text (str): Normalized notes.
+    @param language (str): Language code for TTS.
+    @param slow (bool): Speech speed flag.
+    @param backend (str): Backend name.
+    @return (str): Hex digest. 
+    """
+    payload = "\x1f".join([backend, language, "slow" if slow else "normal", text])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _synthesize_cached(backend: TTSBackend, text: str, language: str, slow: bool, cache_dir: Path, out_path: Path) -> bool:
+    """ 
+    Produce one slide's audio from the cache, synthesizing it only on a miss.
+    @param backend (TTSBackend): Engine used on a cache miss.
+    @param text (str): Normalized notes.
+    @param language (str): Language code for TTS.
+    @param slow (bool): Speech speed flag.
+    @param cache_dir (Path): Content-addressed audio cache.
+    @param out_path (Path): Slide audio destination.
+    @return (bool): True on a cache hit. 
+    """
+    cached = cache_dir / (audio_cache_key(text, language, slow, backend.name) + backend.extension)
+    hit = cached.exists()
+    if not hit:
+        # Unique temp name per thread, renamed atomically so readers never see partial audio
+        tmp_path = cached.with_name(f"{cached.stem}.{os.getpid()}.{id(out_path)}.tmp{backend.extension}")
+        try:
+            backend.synthesize(text, language, slow, tmp_path)
+        except Exception:
+            # The cache is shared across runs and jobs, so a failed attempt must not leave its partial file behind
+            tmp_path.unlink(missing_ok = True)
+            raise
+        tmp_path.replace(cached)
+    shutil.copyfile(cached, out_path)
+    return hit
+
+def synthesize_slide_audio(slides: List[Dict], out_dir: Path, language: str = "vi", backend: str = "gtts", workers: int = 4, slow: bool = False, cache_dir: Optional[Path] = None) -> List[Path]:
+    """ 
+    Create audio files for each slide's speaker notes, concurrently and through a content-addressed cache.
     @param slides (List[Dict]): Slides with 'notes' key.
     @param out_dir (Path): Directory to store audio files.
-    @param language (str): Language code for TTS. 
+    @param language (str): Language code for TTS.
+    @param backend (str): Registered TTS backend name.
+    @param workers (int): Maximum slides synthesized at the same time.
+    @param slow (bool): Speak slowly.
+    @param cache_dir (Optional[Path]): Audio cache directory, defaults to 'out_dir/.cache'.
+    @return (List[Path]): Audio file per slide, in slide order. 
     """
+    engine = get_backend(backend)
+    cache_dir = cache_dir if cache_dir is not None else out_dir / ".cache"
     out_dir.mkdir(parents = True, exist_ok = True)
-    for i, s in enumerate(slides, start = 1):
-        text = normalize_vi_text(s["notes"])
-        tts = gTTS(text = text, lang = language, slow = False)
-        mp3_path = out_dir / f"slide_{i}.mp3"
-        tts.save(str(mp3_path))
\ No newline at end of file
+    cache_dir.mkdir(parents = True, exist_ok = True)
+    texts = [normalize_vi_text(s["notes"]) for s in slides]
+    paths = [out_dir / f"slide_{i}{engine.extension}" for i in range(1, len(slides) + 1)]
+    # Synthesis is network or engine bound, so threads overlap the round trips
+    with ThreadPoolExecutor(max_workers = max(1, workers)) as pool:
+        futures = [pool.submit(_synthesize_cached, engine, text, language, slow, cache_dir, path) for text, path in zip(texts, paths)]
+        for f in futures:
+            f.result()
+    return paths
\ No newline at end of file
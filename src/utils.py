@@ -1,12 +1,18 @@
 # Import necessary libraries
+import hashlib
 import json
 from pathlib import Path
 import random
 import re
 import string
-from typing import Dict
+from typing import Dict, Iterable, Iterator, List
 from unidecode import unidecode
 
+# Compiled once at import; these run for every chunk of every record
+_WHITESPACE_RE = re.compile(r"\s+")
+_SPACE_BEFORE_PUNCT_RE = re.compile(r" ([,.:;])")
+_NON_SLUG_RE = re.compile(r"[^a-z0-9]+")
+
 def set_seed(seed: int = 42) -> None:
     """ 
     Set deterministic random seed for reproducibility.
@@ -24,6 +30,35 @@ def safe_write_json(path: Path, obj: Dict) -> None:
     with path.open("w", encoding = "utf-8") as f:
         json.dump(obj, f, ensure_ascii = False, indent = 2)
 
+def batched(items: Iterable, size: int) -> Iterator[List]:
+    """ 
+    Group an iterable into lists of at most 'size' items without materializing it.
+    @param items (Iterable): Source items.
+    @param size (int): Maximum batch length.
+    @return (Iterator[List]): Consecutive batches. 
+    """
+    batch: List = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def file_sha256(path: Path, block_size: int = 1 << 20) -> str:
+    """ 
+    Compute the SHA-256 hex digest of a file without loading it entirely.
+    @param path (Path): File to hash.
+    @param block_size (int): Bytes read per iteration.
+    @return (str): Hex digest of the file content. 
+    """
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
 def safe_write_text(path: Path, text: str) -> None:
     """ 
     Safely write plain text to a file.
@@ -40,11 +75,9 @@ def normalize_vi_text(text: str) -> str:
     @param text (str): Input Vietnamese text.
     @return (str): Cleaned and normalized text. 
     """
-    text = text.strip()
-    text = re.sub(r"\s+", " ", text)
-    # Keep Vietnamese accents but normalize punctuation spacing
-    text = text.replace(" ,", ",").replace(" .", ".").replace(" :", ":").replace(" ;", ";")
-    return text
+    text = _WHITESPACE_RE.sub(" ", text.strip())
+    # Keep Vietnamese accents but normalize punctuation spacing in a single pass
+    return _SPACE_BEFORE_PUNCT_RE.sub(r"\1", text)
 
 def slugify(text: str, max_len: int = 60) -> str:
     """ 
@@ -54,7 +87,7 @@ def slugify(text: str, max_len: int = 60) -> str:
     @return (str): Safe slug string.
     """
     text_ascii = unidecode(text).lower()
-    text_ascii = re.sub(r"[^a-z0-9]+", "-", text_ascii).strip("-")
+    text_ascii = _NON_SLUG_RE.sub("-", text_ascii).strip("-")
     return text_ascii[:max_len]
 
 def random_title_suffix(n: int = 6) -> str:
@@ -0,0 +1,123 @@
+# Import necessary libraries
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+from pathlib import Path
+import socket
+import sys
+import tempfile
+from threading import Lock, Thread
+from typing import Dict, List, Optional
+import unittest
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from dataset_downloader import DownloadError, iter_dataset_rows, make_session
+
+class StubRowsServer:
+    """ 
+    Local stand-in for the datasets-server '/rows' endpoint.
+
+    Attributes:
+    - total (int): Rows in the stub dataset.
+    - fail_once (Dict[int, int]): Offset to HTTP status returned on the first request for that offset.
+    - requests (List[int]): Offsets requested so far, in arrival order. 
+    """
+
+    def __init__(self, total: int, fail_once: Optional[Dict[int, int]] = None) -> None:
+        self.total = total
+        self.fail_once = dict(fail_once or {})
+        self.requests: List[int] = []
+        self._lock = Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                query = parse_qs(urlparse(self.path).query)
+                offset, length = int(query["offset"][0]), int(query["length"][0])
+                with stub._lock:
+                    stub.requests.append(offset)
+                    status = stub.fail_once.pop(offset, None)
+                if status is not None:
+                    self.send_response(status)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                rows = [{"row_idx": i, "row": {"text": f"Dòng số {i}."}} for i in range(offset, min(offset + length, stub.total))]
+                body = json.dumps({"rows": rows}).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}/rows"
+        self._thread = Thread(target = self._server.serve_forever, daemon = True)
+
+    def __enter__(self) -> "StubRowsServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+def unused_port_url() -> str:
+    """ 
+    URL on a local port nothing listens on.
+    @return (str): Rows URL that refuses connections. 
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}/rows"
+
+class IterDatasetRowsTest(unittest.TestCase):
+    def test_pages_until_short_page(self) -> None:
+        with StubRowsServer(total = 250) as server:
+            rows = list(iter_dataset_rows("stub/news", limit = 1000, page_size = 100, concurrency = 2, base_url = server.url, session = make_session(retries = 0)))
+        self.assertEqual([r["text"] for r in rows], [f"Dòng số {i}." for i in range(250)])
+        self.assertTrue({0, 100, 200}.issubset(server.requests))
+
+    def test_stops_at_limit(self) -> None:
+        with StubRowsServer(total = 1000) as server:
+            rows = list(iter_dataset_rows("stub/news", limit = 150, page_size = 100, base_url = server.url, session = make_session(retries = 0)))
+        self.assertEqual(len(rows), 150)
+        self.assertEqual(sorted(server.requests), [0, 100])
+
+    def test_retries_after_503(self) -> None:
+        with StubRowsServer(total = 300, fail_once = {100: 503}) as server:
+            rows = list(iter_dataset_rows("stub/news", limit = 300, page_size = 100, base_url = server.url, session = make_session(retries = 2, backoff = 0)))
+        self.assertEqual(len(rows), 300)
+        self.assertEqual(server.requests.count(100), 2)
+
+    def test_resumes_from_page_cache(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_dir = Path(tmp)
+            with StubRowsServer(total = 1000) as server:
+                first = list(iter_dataset_rows("stub/news", limit = 200, page_size = 100, cache_dir = cache_dir, base_url = server.url, session = make_session(retries = 0)))
+            # Full pages were cached, so a second run needs no server at all
+            second = list(iter_dataset_rows("stub/news", limit = 200, page_size = 100, cache_dir = cache_dir, base_url = unused_port_url(), session = make_session(retries = 0)))
+        self.assertEqual(first, second)
+        self.assertEqual(len(second), 200)
+
+    def test_short_page_is_not_cached(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_dir = Path(tmp)
+            with StubRowsServer(total = 150) as server:
+                list(iter_dataset_rows("stub/news", limit = 200, page_size = 100, cache_dir = cache_dir, base_url = server.url, session = make_session(retries = 0)))
+            with StubRowsServer(total = 180) as server:
+                rows = list(iter_dataset_rows("stub/news", limit = 200, page_size = 100, cache_dir = cache_dir, base_url = server.url, session = make_session(retries = 0)))
+        self.assertEqual(len(rows), 180)
+        self.assertEqual(server.requests, [100])
+
+    def test_connection_failure_raises_download_error(self) -> None:
+        with self.assertRaises(DownloadError):
+            list(iter_dataset_rows("stub/news", limit = 100, base_url = unused_port_url(), session = make_session(retries = 0)))
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
@@ -0,0 +1,83 @@
+# Import necessary libraries
+import numpy as np
+from pathlib import Path
+import sys
+from typing import List
+import unittest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from data_pipeline import preprocess_records
+from dedup import MinHasher, NearDuplicateFilter, dedup_records
+
+VOCAB = ["dữ liệu", "khách hàng", "thị trường", "công nghệ", "giáo dục", "chiến lược", "doanh nghiệp", "sinh viên", "ứng dụng", "phát triển", "hiệu quả", "mô hình", "quản lý", "sản phẩm", "đánh giá", "nghiên cứu"]
+
+def random_texts(n: int, words: int = 60, seed: int = 7) -> List[str]:
+    """ 
+    Unrelated texts drawn from one small vocabulary, so they share many shingles by chance.
+    @param n (int): Number of texts.
+    @param words (int): Words per text.
+    @param seed (int): Random seed.
+    @return (List[str]): Generated texts. 
+    """
+    rng = np.random.default_rng(seed)
+    return [" ".join(rng.choice(VOCAB, size = words)) for _ in range(n)]
+
+def jaccard(a: str, b: str, k: int = 5) -> float:
+    """ 
+    True Jaccard similarity of two texts' character shingles.
+    @param a (str): First text.
+    @param b (str): Second text.
+    @param k (int): Characters per shingle.
+    @return (float): Shared shingles over all shingles. 
+    """
+    sa, sb = ({t[i:i + k] for i in range(len(t) - k + 1)} for t in (a, b))
+    return len(sa & sb) / len(sa | sb)
+
+class MinHashEstimateTest(unittest.TestCase):
+    def test_estimate_matches_true_jaccard(self) -> None:
+        # Many permutations shrink the sampling error, so a biased hash family would stand out
+        hasher = MinHasher(num_perm = 1024)
+        base = random_texts(40)
+        # Pairs across the whole similarity range: unrelated texts, then copies with more and more words replaced
+        pairs = [(base[i], base[i + 1]) for i in range(0, 20, 2)]
+        for i, text in enumerate(base[20:]):
+            words = text.split(" ")
+            words[:i * 3] = random_texts(1, words = i * 3, seed = i)[0].split(" ")[:i * 3]
+            pairs.append((text, " ".join(words)))
+        errors = []
+        for a, b in pairs:
+            estimate = float(np.mean(hasher.signature(a) == hasher.signature(b)))
+            errors.append(abs(estimate - jaccard(a, b)))
+        # 1024 permutations give a standard error of at most 0.016
+        self.assertLess(np.mean(errors), 0.02)
+        self.assertLess(max(errors), 0.07)
+
+class NearDuplicateFilterTest(unittest.TestCase):
+    def test_unrelated_texts_are_kept(self) -> None:
+        dup_filter = NearDuplicateFilter(threshold = 0.8)
+        dropped = [text for text in random_texts(3000) if dup_filter.is_duplicate(text, ("a", "b", "c"))]
+        self.assertEqual(dropped, [])
+
+    def test_near_and_exact_copies_are_dropped(self) -> None:
+        dup_filter = NearDuplicateFilter(threshold = 0.8)
+        text = random_texts(1)[0]
+        partition = ("a", "b", "c")
+        self.assertFalse(dup_filter.is_duplicate(text, partition))
+        self.assertTrue(dup_filter.is_duplicate(text.upper(), partition))
+        self.assertTrue(dup_filter.is_duplicate(text.replace("dữ liệu", "dữ liệu lớn", 1) + ".", partition))
+        # Another topic, intent or audience is never a duplicate
+        self.assertFalse(dup_filter.is_duplicate(text, ("a", "b", "d")))
+        self.assertEqual(dup_filter.stats(), {"kept": 2, "exact_removed": 1, "near_removed": 1})
+
+    def test_worker_sketches_match_inline_ones(self) -> None:
+        raw = [("a", "b", "c", text + ". " + text) for text in random_texts(50, words = 40)] * 2
+        inline = NearDuplicateFilter(threshold = 0.8)
+        sketched = NearDuplicateFilter(threshold = 0.8)
+        kept_inline = [(r.text, r.spans) for r in dedup_records(preprocess_records(raw), inline)]
+        kept_sketched = [(r.text, r.spans) for r in dedup_records(preprocess_records(raw, hasher = sketched.hasher), sketched)]
+        self.assertEqual(kept_inline, kept_sketched)
+        self.assertEqual(inline.stats(), sketched.stats())
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
@@ -0,0 +1,95 @@
+# Import necessary libraries
+import numpy as np
+from pathlib import Path
+import sys
+import tempfile
+from typing import List
+import unittest
+import zlib
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from data_pipeline import DatasetRecord, write_records
+from embedding_index import EmbeddingIndex
+from model_registry import register_model
+
+STUB_MODEL_NAME = "stub/random-encoder-64"
+
+class RandomEncoder:
+    """ 
+    Offline encoder giving every distinct text its own seeded random unit vector. 
+    """
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return 64
+
+    def encode(self, texts: List[str], convert_to_numpy: bool = True, normalize_embeddings: bool = True, **kwargs) -> np.ndarray:
+        emb = np.stack([np.random.default_rng(zlib.crc32(text.encode("utf-8"))).standard_normal(64) for text in texts]).astype(np.float32)
+        return emb / np.linalg.norm(emb, axis = 1, keepdims = True)
+
+def write_dataset(path: Path, numbers: List[int]) -> None:
+    """ 
+    Write one record per number, each holding a single unique chunk.
+    @param path (Path): Packed dataset file.
+    @param numbers (List[int]): Chunk numbers to include. 
+    """
+    records = []
+    for i in numbers:
+        text = f"Đoạn văn số {i} về chuyển đổi số."
+        records.append(DatasetRecord("Chuyển đổi số", "giảng dạy", ["sinh viên", "quản lý"][i % 2], text, [(0, len(text))]))
+    write_records(records, path)
+
+class UpdateWithDeletesTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        register_model(STUB_MODEL_NAME, RandomEncoder())
+
+    def updated_index(self, tmp: Path, index_type: str, **kwargs) -> EmbeddingIndex:
+        """ 
+        Build an index over 400 chunks, then drop every third one and add 60 new ones. 
+        """
+        write_dataset(tmp / "before.pack", list(range(400)))
+        write_dataset(tmp / "after.pack", [i for i in range(460) if i % 3])
+        index = EmbeddingIndex(model_name = STUB_MODEL_NAME, index_type = index_type, nlist = 8, nprobe = 8, embeddings_mode = "ram", **kwargs)
+        index.build(tmp / "before.pack")
+        counts = index.update(tmp / "after.pack")
+        self.assertEqual(counts["removed"], 134)
+        self.assertEqual(index.index.ntotal, len(index.meta))
+        return index
+
+    def test_scores_belong_to_returned_chunks(self) -> None:
+        # Exact or nearly exact codes, so every reported score must be the chunk's own inner product
+        for index_type, tolerance in [("flat", 1e-4), ("ivf_flat", 1e-4), ("sq_fp16", 1e-3), ("sq8", 2e-2), ("ivf_sq8", 2e-2), ("hnsw", 1e-4)]:
+            with self.subTest(index_type = index_type), tempfile.TemporaryDirectory() as tmp:
+                index = self.updated_index(Path(tmp), index_type)
+                queries = [f"Câu hỏi {i}" for i in range(20)]
+                for query, results in zip(queries, index.search_many(queries, top_k = 5)):
+                    q_emb = index.encode([query])[0]
+                    for item in results:
+                        self.assertAlmostEqual(item["score"], float(index.encode([item["chunk"]])[0] @ q_emb), delta = tolerance)
+
+    def test_chunks_find_themselves(self) -> None:
+        for index_type in ["ivf_flat", "ivf_pq", "ivf_sq8"]:
+            with self.subTest(index_type = index_type), tempfile.TemporaryDirectory() as tmp:
+                # Few PQ sub-quantizers keep codebook training quick on 400 points
+                index = self.updated_index(Path(tmp), index_type, pq_m = 4, rescore_factor = 4)
+                chunks = [f"Đoạn văn số {i} về chuyển đổi số." for i in range(460) if i % 3]
+                for chunk, results in zip(chunks, index.search_many(chunks, top_k = 1)):
+                    self.assertEqual(results[0]["chunk"], chunk)
+
+    def test_memory_mapped_update_rewrites_the_cache_file(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            write_dataset(tmp / "before.pack", list(range(400)))
+            write_dataset(tmp / "after.pack", [i for i in range(460) if i % 3])
+            cache_dir = tmp / "cache"
+            EmbeddingIndex(model_name = STUB_MODEL_NAME).build_or_load(tmp / "before.pack", cache_dir)
+            index = EmbeddingIndex(model_name = STUB_MODEL_NAME, embeddings_mode = "mmap")
+            self.assertFalse(index.build_or_load(tmp / "after.pack", cache_dir))
+            self.assertIsInstance(index.embeddings, np.memmap)
+            self.assertEqual(sorted(p.name for p in cache_dir.glob("embeddings*")), ["embeddings.npy"])
+            expected = index.encode(list(index.meta.iter_chunks()))
+            np.testing.assert_allclose(np.load(cache_dir / "embeddings.npy"), expected, atol = 1e-6)
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file